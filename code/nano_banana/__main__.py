@@ -1,22 +1,88 @@
-"""Main entry point for Nano Banana Desktop."""
+"""
+Main entry point for Nano Banana Desktop.
+
+``python -m nano_banana`` opens the GUI; ``python -m nano_banana batch ...``
+runs the headless batch editor, which doesn't need Qt.
+``--profile-startup`` prints how long each startup phase of the GUI took.
+"""
 
 import sys
-from PySide6.QtWidgets import QApplication
+import time
 
-from .ui.main_window import MainWindow
 
+class StartupProfiler:
+    """Records named phases of startup and prints their durations."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []  # (name, seconds)
+
+    def mark(self, phase: str):
+        """End the current phase, naming it ``phase``."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self, title: str = "Startup timings"):
+        """Print the phases recorded so far to stderr."""
+        if not self.enabled:
+            return
+        width = max(len(name) for name, _ in self.phases)
+        lines = [f"{title}:"]
+        lines += [f"  {name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {'total':<{width}}  {(self._last - self.started) * 1000:8.1f} ms")
+        print("\n".join(lines), file=sys.stderr)
+
+
+def run_gui(profiler: StartupProfiler):
+    """Run the desktop application."""
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QTimer
+    profiler.mark("import Qt")
 
-def main():
-    """Run the application."""
     app = QApplication(sys.argv)
     app.setApplicationName("Nano Banana Desktop")
     app.setOrganizationName("Daniel Rosehill")
+    profiler.mark("create QApplication")
+
+    from .ui.main_window import MainWindow
+    profiler.mark("import main window")
 
     window = MainWindow()
+    profiler.mark("create main window")
+
     window.show()
+    profiler.mark("show window")
+
+    if profiler.enabled:
+        def on_first_pass():
+            profiler.mark("first event loop pass (window painted)")
+            profiler.report()
+
+        def on_api_key_checked(found: bool):
+            profiler.mark("API key lookup finished (background thread)")
+            profiler.report("Startup timings including the API key lookup")
+
+        # Timers fire after the pending show and paint events have been handled
+        QTimer.singleShot(0, on_first_pass)
+        window.api_key_checked.connect(on_api_key_checked)
 
     sys.exit(app.exec())
 
 
+def main():
+    """Run the application, or the batch command if requested."""
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from .batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    profile_startup = "--profile-startup" in sys.argv
+    if profile_startup:
+        sys.argv.remove("--profile-startup")
+    run_gui(StartupProfiler(profile_startup))
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,433 @@
+"""
+Headless batch editing: ``python -m nano_banana batch``.
+
+Applies one prompt to many images with several requests in flight, saving
+each result as a new version through ``FileManager``. Finished images are
+recorded in a journal, so re-running the same command after an
+interruption only sends the images that are still missing.
+
+This module must not import PySide6, so it runs on machines without Qt.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .core.encoded_image import EncodedImage
+from .core.gemini_client import GeminiClient
+from .core.rate_limiter import RateLimiter
+from .core.response_cache import ResponseCache
+from .utils.file_manager import FileManager, StorageOptions
+from .utils.prompts import PromptManager
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp"}
+API_KEY_ENV_VAR = "GEMINI_API_KEY"
+DEFAULT_JOURNAL_NAME = "nano-banana-batch.jsonl"
+
+
+def collect_images(inputs: Sequence[str]) -> List[Path]:
+    """
+    Expand files, directories and glob patterns into a list of images.
+
+    Directories contribute the images directly inside them. Each image
+    appears once, in the order it was first found.
+
+    Args:
+        inputs: Paths or glob patterns
+
+    Returns:
+        Image paths
+    """
+    images: Dict[Path, None] = {}
+    for entry in inputs:
+        matches = sorted(glob.glob(entry)) if glob.has_magic(entry) else [entry]
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                candidates = sorted(path.iterdir())
+            else:
+                candidates = [path]
+            for candidate in candidates:
+                if candidate.is_file() and candidate.suffix.lower() in IMAGE_SUFFIXES:
+                    images.setdefault(candidate.resolve(), None)
+    return list(images)
+
+
+def version_dir_of(image_path: Path) -> Path:
+    """Directory ``FileManager`` keeps an image's versions in (``foo/a.png`` -> ``foo/a``)."""
+    return image_path.parent / image_path.stem
+
+
+def split_shared_version_dirs(images: Sequence[Path]) -> Tuple[List[Path], List[Path]]:
+    """
+    Separate images whose versions would be filed in the same directory.
+
+    ``a.jpg`` and ``a.png`` in one folder share ``a/``, so the second one's
+    edits would end up in the first one's history. The first image of each
+    directory is kept.
+
+    Args:
+        images: Image paths
+
+    Returns:
+        Tuple of (images to process, images left out)
+    """
+    seen = set()
+    kept, skipped = [], []
+    for image_path in images:
+        version_dir = version_dir_of(image_path)
+        if version_dir in seen:
+            skipped.append(image_path)
+        else:
+            seen.add(version_dir)
+            kept.append(image_path)
+    return kept, skipped
+
+
+class BatchJournal:
+    """
+    Append-only JSON-lines record of finished images.
+
+    Each line is written and flushed to disk as soon as an image's version
+    has been saved; a partially written last line (from a crash) is
+    ignored when the journal is loaded.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open a journal, loading any existing entries.
+
+        Args:
+            path: Journal file; created on the first record
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(image_path: Path, prompt: str, aspect_ratio: Optional[str]) -> str:
+        """Identify one unit of work: an image edited with a prompt."""
+        digest = hashlib.sha256()
+        for field in (str(Path(image_path).resolve()), prompt, aspect_ratio or ""):
+            encoded = field.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _load(self):
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                self.entries[entry["key"]] = entry
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def is_done(self, key: str) -> bool:
+        """Check whether a unit of work has been recorded."""
+        return key in self.entries
+
+    def record(self, key: str, **fields):
+        """
+        Record a finished unit of work durably.
+
+        Args:
+            key: Key from ``make_key``
+            **fields: Details to store with it (image, version, ...)
+        """
+        entry = {"key": key, **fields}
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as journal:
+                journal.write(line)
+                journal.flush()
+                os.fsync(journal.fileno())
+            self.entries[key] = entry
+
+
+class BatchStats:
+    """Counters for the end-of-run report."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.output_bytes = 0
+        self.request_seconds = 0.0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Wall-clock seconds of the run."""
+        return (self.finished or time.monotonic()) - self.started
+
+    def report(self, client: GeminiClient) -> str:
+        """Summarize throughput and savings."""
+        elapsed = max(self.elapsed, 1e-9)
+        lines = [
+            f"Edited {self.succeeded} of {self.total} images in {elapsed:.1f}s "
+            f"({self.succeeded / elapsed * 60:.1f} images/min)",
+            f"Skipped {self.skipped} already in the journal, {self.failed} failed",
+        ]
+        if self.succeeded:
+            lines.append(
+                f"Average request time {self.request_seconds / self.succeeded:.1f}s, "
+                f"{self.output_bytes / 1e6:.1f} MB of versions written"
+            )
+        if client.upload_bytes_original:
+            lines.append(
+                f"Uploaded {client.upload_bytes_sent / 1e6:.1f} MB "
+                f"(inputs were {client.upload_bytes_original / 1e6:.1f} MB)"
+            )
+        if client.cache is not None:
+            lines.append(f"Response cache: {client.cache.hits} hits, {client.cache.misses} misses")
+        if client.coalesced_requests:
+            lines.append(f"Coalesced duplicate requests: {client.coalesced_requests}")
+        return "\n".join(lines)
+
+
+def save_result(
+    file_manager: FileManager,
+    result: EncodedImage,
+    prompt: str,
+    model: str
+) -> Tuple[Path, int]:
+    """Save an edit as the image's next version; return its path and number."""
+    version_number, version_path = file_manager.add_version(result, prompt=prompt, model=model)
+    return version_path, version_number
+
+
+async def run_batch(
+    client: GeminiClient,
+    images: Sequence[Path],
+    prompt: str,
+    journal: BatchJournal,
+    jobs: int,
+    aspect_ratio: Optional[str] = None,
+    storage_options: Optional[StorageOptions] = None,
+    timeout: Optional[float] = None
+) -> BatchStats:
+    """
+    Edit every image not yet in the journal, ``jobs`` at a time.
+
+    Failures are reported and counted but don't stop the run. Saves into
+    the same version directory are serialized and share one
+    ``FileManager``, so concurrent edits never pick the same version number.
+
+    Args:
+        client: Client performing the edits
+        images: Images to edit
+        prompt: Prompt applied to every image
+        journal: Journal of finished images
+        jobs: Maximum concurrent edits
+        aspect_ratio: Optional output aspect ratio
+        storage_options: How versions are encoded on disk
+        timeout: Per-request deadline in seconds
+
+    Returns:
+        Run statistics
+    """
+    stats = BatchStats(len(images))
+    semaphore = asyncio.Semaphore(jobs)
+    width = len(str(len(images)))
+    file_managers: Dict[Path, FileManager] = {}
+    save_locks: Dict[Path, asyncio.Lock] = {}
+
+    async def save(image_path: Path, result: EncodedImage) -> Tuple[Path, int]:
+        version_dir = version_dir_of(image_path)
+        async with save_locks.setdefault(version_dir, asyncio.Lock()):
+            file_manager = file_managers.get(version_dir)
+            if file_manager is None:
+                file_manager = await asyncio.to_thread(FileManager, image_path, storage_options)
+                file_managers[version_dir] = file_manager
+            return await asyncio.to_thread(
+                save_result, file_manager, result, prompt, client.MODEL_NAME
+            )
+
+    async def process(index: int, image_path: Path):
+        label = f"[{index:>{width}}/{len(images)}] {image_path.name}"
+        key = journal.make_key(image_path, prompt, aspect_ratio)
+        if journal.is_done(key):
+            stats.skipped += 1
+            print(f"{label}: already done, skipping")
+            return
+
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result, _ = await client.aedit_image(
+                    image_path, prompt, aspect_ratio=aspect_ratio, timeout=timeout
+                )
+                version_path, version_number = await save(image_path, result)
+            except Exception as e:
+                stats.failed += 1
+                print(f"{label}: FAILED: {e}")
+                return
+            seconds = time.monotonic() - started
+
+        journal.record(
+            key,
+            image=str(image_path),
+            version=version_number,
+            file=version_path.name,
+            seconds=round(seconds, 3),
+        )
+        stats.succeeded += 1
+        stats.output_bytes += len(result)
+        stats.request_seconds += seconds
+        print(f"{label} -> {version_path.name} ({seconds:.1f}s)")
+
+    await asyncio.gather(*(process(index, path) for index, path in enumerate(images, 1)))
+    stats.finished = time.monotonic()
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the ``batch`` argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nano_banana batch",
+        description="Apply a prompt to many images without the GUI.",
+    )
+    parser.add_argument("inputs", nargs="*", help="image files, directories or glob patterns")
+    parser.add_argument("-p", "--prompt", default="", help="custom editing instructions")
+    parser.add_argument(
+        "-t", "--template", action="append", default=[],
+        help="prompt template name, e.g. comic-book (repeatable)"
+    )
+    parser.add_argument(
+        "--list-templates", action="store_true", help="list template names and exit"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="concurrent requests (default: 4)"
+    )
+    parser.add_argument(
+        "--journal", type=Path, default=Path(DEFAULT_JOURNAL_NAME),
+        help=f"progress journal used to resume (default: ./{DEFAULT_JOURNAL_NAME})"
+    )
+    parser.add_argument(
+        "--aspect-ratio", default="preserve", help="e.g. 1:1 or 16:9 (default: preserve)"
+    )
+    parser.add_argument(
+        "--requests-per-minute", type=float, default=None,
+        help="spread requests to stay under a quota"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=GeminiClient.DEFAULT_REQUEST_TIMEOUT,
+        help="per-request deadline in seconds"
+    )
+    parser.add_argument(
+        "--storage-format", default="original", choices=["original", "png", "webp", "jpeg"],
+        help="encoding of saved versions (default: as returned by the model)"
+    )
+    parser.add_argument("--quality", type=int, default=90, help="quality for lossy WebP/JPEG")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the response cache")
+    parser.add_argument(
+        "--mock", action="store_true",
+        help="send requests to a local mock server instead of the API (for testing)"
+    )
+    parser.add_argument(
+        "--mock-latency", type=float, default=0.5, help="mock server response time in seconds"
+    )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the batch command.
+
+    Returns:
+        Exit status: 0 if every image was edited or skipped, 1 if any failed,
+        2 for usage errors
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    prompt_manager = PromptManager.shared()
+
+    if args.list_templates:
+        for category in prompt_manager.get_categories():
+            for template in prompt_manager.get_templates_by_category(category):
+                print(f"{template.name:<32} {category}")
+        return 0
+
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    templates = []
+    for name in args.template:
+        template = prompt_manager.get_template_by_name(name)
+        if template is None:
+            parser.error(f"unknown template: {name} (see --list-templates)")
+        templates.append(template)
+
+    prompt = prompt_manager.build_prompt(args.prompt, templates)
+    if not prompt:
+        parser.error("give a --prompt and/or at least one --template")
+
+    images, skipped = split_shared_version_dirs(collect_images(args.inputs))
+    if not images:
+        parser.error("no images found")
+    for image_path in skipped:
+        print(
+            f"Warning: skipping {image_path}: its versions would share "
+            f"{version_dir_of(image_path)} with another input"
+        )
+
+    backend = None
+    if args.mock:
+        from .core.backends import LocalServerBackend
+        backend = LocalServerBackend(latency=args.mock_latency)
+
+    client = GeminiClient(
+        api_key=os.environ.get(API_KEY_ENV_VAR),
+        cache=None if args.no_cache else ResponseCache(),
+        rate_limiter=RateLimiter(
+            requests_per_minute=args.requests_per_minute, max_concurrency=args.jobs
+        ),
+        request_timeout=args.timeout,
+        backend=backend,
+    )
+    if not client.has_api_key():
+        print(f"No API key: set {API_KEY_ENV_VAR} or configure one in the desktop app.")
+        return 2
+
+    storage_options = None
+    if args.storage_format != "original":
+        storage_options = StorageOptions(args.storage_format, quality=args.quality)
+
+    journal = BatchJournal(args.journal)
+    aspect_ratio = None if args.aspect_ratio == "preserve" else args.aspect_ratio
+    print(
+        f"Editing {len(images)} images with {args.jobs} concurrent requests "
+        f"(journal: {journal.path})"
+    )
+
+    future = client.submit(run_batch(
+        client, images, prompt, journal, args.jobs,
+        aspect_ratio=aspect_ratio, storage_options=storage_options, timeout=args.timeout
+    ))
+    try:
+        stats = future.result()
+    except KeyboardInterrupt:
+        future.cancel()
+        print(f"\nInterrupted; finished images are in {journal.path}, run again to resume.")
+        client.close()
+        return 130
+
+    print()
+    print(stats.report(client))
+    client.close()
+    return 1 if stats.failed else 0
@@ -0,0 +1,91 @@
+"""Transport backends used by GeminiClient to reach a generate_content endpoint."""
+
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+    from .mock_server import MockGeminiServer
+
+
+class Backend:
+    """
+    Interface between GeminiClient and whatever serves generate_content.
+
+    Implementations return google-genai response objects (or anything with
+    the same ``candidates[0].content.parts`` shape) and raise the SDK's
+    ``APIError`` family on HTTP errors, so retry and caching behave the same
+    whichever backend is in use.
+    """
+
+    async def generate_content(self, model: str, contents: list) -> "types.GenerateContentResponse":
+        """Send one request and return the complete response."""
+        raise NotImplementedError
+
+    async def generate_content_stream(
+        self,
+        model: str,
+        contents: list
+    ) -> AsyncIterator["types.GenerateContentResponse"]:
+        """Send one request and return an async iterator over response chunks."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class GenaiBackend(Backend):
+    """Backend using the google-genai SDK against the real API (or any compatible base URL)."""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        """
+        Initialize the SDK client.
+
+        Args:
+            api_key: Gemini API key
+            base_url: Optional endpoint override, e.g. a local mock server
+        """
+        # The SDK takes about half a second to import, so it is loaded on first use
+        import google.genai as genai
+        from google.genai import types
+
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+
+    async def generate_content(self, model: str, contents: list) -> "types.GenerateContentResponse":
+        return await self.client.aio.models.generate_content(model=model, contents=contents)
+
+    async def generate_content_stream(
+        self,
+        model: str,
+        contents: list
+    ) -> AsyncIterator["types.GenerateContentResponse"]:
+        return await self.client.aio.models.generate_content_stream(model=model, contents=contents)
+
+
+class LocalServerBackend(GenaiBackend):
+    """
+    SDK backend pointed at a local ``MockGeminiServer``.
+
+    Requests go through the real SDK and HTTP stack, so throughput, retry and
+    caching can be measured offline. If no server is passed, one is started
+    with ``server_options`` and stopped again by ``close()``.
+    """
+
+    def __init__(self, server: Optional["MockGeminiServer"] = None, **server_options):
+        """
+        Initialize the backend.
+
+        Args:
+            server: Running server to use. If None, a new one is started.
+            **server_options: Options for the new server (latency, error_rate, ...)
+        """
+        from .mock_server import MockGeminiServer
+
+        self.owns_server = server is None
+        self.server = server or MockGeminiServer(**server_options).start()
+        super().__init__(api_key="mock-api-key", base_url=self.server.url)
+
+    def close(self):
+        if self.owns_server:
+            self.server.stop()
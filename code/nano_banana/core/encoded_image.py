@@ -0,0 +1,75 @@
+"""Encoded image bytes as returned by the model."""
+
+from io import BytesIO
+from typing import Optional
+from PIL import Image
+
+# (magic prefix, MIME type) pairs used to recognise encoded images
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+def sniff_mime_type(data: bytes) -> Optional[str]:
+    """
+    Identify an encoded image from its leading bytes.
+
+    Args:
+        data: Encoded image
+
+    Returns:
+        MIME type, or None if the format isn't recognised
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime_type in SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    return None
+
+
+class EncodedImage:
+    """
+    An image kept in its encoded form.
+
+    The bytes are stored to disk unchanged and only decoded when pixels are
+    needed, avoiding a decode/re-encode round trip for every edit.
+    """
+
+    def __init__(self, data: bytes, mime_type: Optional[str] = None):
+        """
+        Initialize the image.
+
+        Args:
+            data: Encoded image bytes
+            mime_type: MIME type of ``data``; detected from the bytes if None
+        """
+        self.data = data
+        self.mime_type = sniff_mime_type(data) or mime_type or "image/png"
+
+    @property
+    def extension(self) -> str:
+        """File extension matching the encoding, including the dot."""
+        return EXTENSIONS.get(self.mime_type, ".png")
+
+    def decode(self) -> Image.Image:
+        """Decode the bytes into a new PIL Image."""
+        image = Image.open(BytesIO(self.data))
+        image.load()
+        return image
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"EncodedImage({self.mime_type}, {len(self.data)} bytes)"
@@ -0,0 +1,126 @@
+"""Exception types raised by the Gemini client."""
+
+from typing import TYPE_CHECKING, Optional
+import re
+
+if TYPE_CHECKING:
+    from google.genai import errors as genai_errors
+
+
+class GeminiError(Exception):
+    """Base class for errors talking to the Gemini API."""
+
+    #: Whether the same request may succeed if sent again later
+    retryable = False
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class MissingApiKeyError(GeminiError, ValueError):
+    """No API key has been configured."""
+
+
+class AuthenticationError(GeminiError):
+    """The API key was rejected (401/403)."""
+
+
+class InvalidRequestError(GeminiError):
+    """The request was malformed or refused by the model (other 4xx)."""
+
+
+class NoImageError(GeminiError):
+    """The model answered without an image part."""
+
+
+class RateLimitError(GeminiError):
+    """Quota or rate limit exceeded (429)."""
+
+    retryable = True
+
+
+class ServiceUnavailableError(GeminiError):
+    """The service is overloaded or failing (5xx)."""
+
+    retryable = True
+
+
+class RequestTimeoutError(GeminiError):
+    """The request did not complete before its deadline."""
+
+
+class NetworkError(GeminiError):
+    """The request could not reach the service or timed out in transit."""
+
+    retryable = True
+
+
+RETRYABLE_SERVER_CODES = {500, 502, 503, 504}
+
+
+def _parse_retry_after(error: "genai_errors.APIError") -> Optional[float]:
+    """Extract a server-suggested delay from headers or a RetryInfo detail."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = error.details if isinstance(error.details, dict) else {}
+    for detail in details.get("error", {}).get("details", []):
+        if isinstance(detail, dict) and detail.get("@type", "").endswith("RetryInfo"):
+            match = re.fullmatch(r"([\d.]+)s", str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def classify_error(error: Exception, action: str = "call Gemini") -> GeminiError:
+    """
+    Convert an exception from the SDK or transport into a typed GeminiError.
+
+    Args:
+        error: The exception that was raised
+        action: Short description used in the message, e.g. "edit image"
+
+    Returns:
+        The matching GeminiError subclass instance
+    """
+    if isinstance(error, GeminiError):
+        return error
+
+    # Imported here so that loading this module doesn't pull in the SDK
+    from google.genai import errors as genai_errors
+    import httpx
+
+    if isinstance(error, genai_errors.APIError):
+        code = error.code
+        status = f"{code} {error.status}" if error.status else str(code)
+        message = f"Failed to {action} ({status}): {error.message or error}"
+        retry_after = _parse_retry_after(error)
+
+        if code == 429:
+            return RateLimitError(message, code, retry_after)
+        if code in (401, 403):
+            return AuthenticationError(message, code)
+        if code in RETRYABLE_SERVER_CODES:
+            return ServiceUnavailableError(message, code, retry_after)
+        if 400 <= code < 500:
+            return InvalidRequestError(message, code)
+        return GeminiError(message, code)
+
+    if isinstance(error, (httpx.TransportError, ConnectionError)):
+        return NetworkError(f"Failed to {action}: network error: {error}")
+
+    return GeminiError(f"Failed to {action}: {error}")
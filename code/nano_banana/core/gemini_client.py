@@ -1,36 +1,154 @@
 """Gemini API client for image-to-image transformations."""
 
-from typing import Optional, Tuple
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
 from pathlib import Path
-from io import BytesIO
-from PIL import Image
-import google.genai as genai
-import keyring
+from concurrent.futures import Future
+import asyncio
+import logging
+import threading
+import time
+
+from .backends import Backend, GenaiBackend
+from .encoded_image import EncodedImage
+from .errors import (
+    MissingApiKeyError, NoImageError, RateLimitError, RequestTimeoutError, classify_error
+)
+from .rate_limiter import RateLimiter, RetryPolicy
+from .response_cache import ResponseCache
+from .upload import PreparedUpload, UploadOptions, prepare_upload
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _InflightRequest:
+    """A request shared by every caller that asked for the same edit."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
 
 
 class GeminiClient:
-    """Client for interacting with Gemini's image generation API."""
+    """
+    Client for interacting with Gemini's image generation API.
+
+    Requests are sent through a ``Backend``: by default ``GenaiBackend`` (the
+    google-genai SDK), or e.g. ``LocalServerBackend`` for offline load tests.
+
+    The async methods (``aedit_image`` / ``agenerate_image``) are the primary
+    implementation and can be awaited from any event loop. Requests go through
+    a ``RateLimiter`` (at most ``max_concurrency`` in flight per event loop,
+    plus an optional requests-per-minute budget); extra callers wait for a
+    free slot instead of opening another connection. Rate-limit and server
+    errors are retried according to ``retry_policy``; failures surface as
+    ``GeminiError`` subclasses.
+
+    With ``stream=True`` the response is read via ``generate_content_stream``:
+    ``on_first_byte`` reports time-to-first-chunk and ``on_text`` receives text
+    parts as they arrive. Callbacks run on the thread of the event loop.
+
+    Each request is bounded by ``request_timeout`` (overridable per call) and
+    raises ``RequestTimeoutError`` when it expires. Cancelling the future from
+    ``submit_edit`` cancels the request and releases its concurrency slot.
+
+    Callers without an event loop (the Qt UI, scripts) can use ``submit_edit``
+    / ``submit_generate``, which schedule the coroutine on a background loop
+    owned by the client and return a ``concurrent.futures.Future``, or the
+    blocking ``edit_image`` / ``generate_image`` wrappers.
+
+    If a ``ResponseCache`` is supplied, edits are looked up by a hash of the
+    input image, prompt, model and aspect ratio before any request is made.
+
+    Identical edits (same image bytes, prompt and settings) issued while one
+    is already in flight share that request instead of being billed twice;
+    ``coalesced_requests`` counts how often that happened.
+
+    Input images are downscaled and re-encoded according to ``upload_options``
+    before being sent; ``upload_bytes_original`` / ``upload_bytes_sent`` keep a
+    running total of what that saved.
+
+    Constructing a client is cheap: the keyring lookup (when no key is given)
+    and the import of the SDK happen on first use, in ``load_api_key``, which
+    the UI calls on a background thread after the window is shown.
+    """
 
     MODEL_NAME = "gemini-2.5-flash-image-preview"
     KEYRING_SERVICE = "nano-banana-desktop"
     KEYRING_USERNAME = "gemini-api-key"
+    DEFAULT_MAX_CONCURRENCY = RateLimiter.DEFAULT_MAX_CONCURRENCY
+    DEFAULT_REQUEST_TIMEOUT = 180.0
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache: Optional[ResponseCache] = None,
+        upload_options: Optional[UploadOptions] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT,
+        backend: Optional[Backend] = None
+    ):
         """
         Initialize the Gemini client.
 
         Args:
             api_key: Optional API key. If not provided, will try to load from keyring.
+            max_concurrency: Maximum number of requests in flight per event loop.
+                Ignored when ``rate_limiter`` is given.
+            cache: Optional response cache consulted by ``aedit_image``
+            upload_options: Pre-upload resize/encode settings. Defaults to ``UploadOptions()``.
+            rate_limiter: Limiter to share with other clients. Defaults to a private one.
+            retry_policy: Backoff settings for retryable errors. Defaults to ``RetryPolicy()``.
+            request_timeout: Default deadline in seconds for each request, or None for no limit
+            backend: Transport to use instead of the SDK; no API key is needed then
+        """
+        self.backend = backend
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter or RateLimiter(max_concurrency=max_concurrency)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.request_timeout = request_timeout
+        self.cache = cache
+        self.upload_options = upload_options or UploadOptions()
+        self.upload_bytes_original = 0
+        self.upload_bytes_sent = 0
+        self.coalesced_requests = 0
+        self._inflight: Dict[str, _InflightRequest] = {}
+
+        # Background event loop used by the submit_* and blocking wrappers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+        # Keyring lookup and SDK setup are deferred to load_api_key()
+        self._key_lock = threading.Lock()
+        self._key_loaded = False
+
+    def load_api_key(self) -> bool:
         """
-        self.api_key = api_key or self._load_api_key()
-        self.client = None
+        Look up the API key (if none was given) and set up the backend.
+
+        Runs once; later calls return immediately. Safe to call from any
+        thread, so the UI can do the slow part off the GUI thread.
 
-        if self.api_key:
-            self._initialize_client()
+        Returns:
+            Whether an API key (or a custom backend) is configured
+        """
+        with self._key_lock:
+            if not self._key_loaded:
+                if self.backend is None:
+                    self.api_key = self.api_key or self._load_api_key()
+                    if self.api_key:
+                        self._initialize_client()
+                self._key_loaded = True
+            return self.backend is not None
 
     def _load_api_key(self) -> Optional[str]:
         """Load API key from system keyring."""
         try:
+            import keyring
             return keyring.get_password(self.KEYRING_SERVICE, self.KEYRING_USERNAME)
         except Exception as e:
             print(f"Failed to load API key from keyring: {e}")
@@ -39,7 +157,7 @@ class GeminiClient:
     def _initialize_client(self):
         """Initialize the Gemini API client."""
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            self.backend = GenaiBackend(self.api_key)
         except Exception as e:
             raise ValueError(f"Failed to initialize Gemini client: {e}")
 
@@ -51,22 +169,229 @@ class GeminiClient:
             api_key: The Gemini API key to save
         """
         try:
+            import keyring
             keyring.set_password(self.KEYRING_SERVICE, self.KEYRING_USERNAME, api_key)
-            self.api_key = api_key
-            self._initialize_client()
+            with self._key_lock:
+                self.api_key = api_key
+                self._initialize_client()
+                self._key_loaded = True
         except Exception as e:
             raise ValueError(f"Failed to save API key: {e}")
 
     def has_api_key(self) -> bool:
-        """Check if an API key is configured."""
-        return self.api_key is not None and self.client is not None
+        """Check if an API key (or a custom backend) is configured, loading it on first use."""
+        return self.load_api_key()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop on first use and return it."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="gemini-client-loop",
+                    daemon=True
+                )
+                thread.start()
+                self._loop = loop
+                self._loop_thread = thread
+            return self._loop
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        """
+        Schedule a coroutine on the client's background event loop.
 
-    def edit_image(
+        Args:
+            coro: Coroutine to run (typically from ``aedit_image``)
+
+        Returns:
+            Future that resolves with the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def close(self):
+        """Stop the background event loop, if one was started, and close the backend."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = None
+            self._loop_thread = None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+        if self.backend is not None:
+            self.backend.close()
+
+    @staticmethod
+    def _iter_parts(response) -> Iterator:
+        """Yield the content parts of a response or stream chunk."""
+        if not response.candidates or response.candidates[0].content is None:
+            return
+        yield from response.candidates[0].content.parts or []
+
+    @classmethod
+    def _extract_result(cls, response) -> Tuple[Optional[bytes], Optional[str]]:
+        """Pull the encoded image bytes and any text out of a generate_content response."""
+        image_bytes = None
+        text_response = None
+
+        for part in cls._iter_parts(response):
+            if part.text is not None:
+                text_response = part.text
+            elif part.inline_data is not None:
+                image_bytes = part.inline_data.data
+
+        return image_bytes, text_response
+
+    @staticmethod
+    def _no_image_message(action: str, text_response: Optional[str]) -> str:
+        """Describe a response without an image, including any explanation from the model."""
+        message = f"Failed to {action}: no image generated in response"
+        if text_response:
+            message += f"\n\nModel response: {text_response}"
+        return message
+
+    async def _request_image(
+        self,
+        contents: list,
+        action: str,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Call the model under a deadline covering throttling, retries and transfer.
+
+        Args:
+            contents: Request contents
+            action: Short description for error messages, e.g. "edit image"
+            timeout: Deadline in seconds; None uses ``request_timeout``
+            **kwargs: Streaming options for ``_request_with_retries``
+
+        Raises:
+            RequestTimeoutError: If the deadline passes first
+            GeminiError: If the request fails
+        """
+        timeout = self.request_timeout if timeout is None else timeout
+        request = self._request_with_retries(contents, action, **kwargs)
+        if timeout is None:
+            return await request
+
+        try:
+            return await asyncio.wait_for(request, timeout)
+        except asyncio.TimeoutError:
+            raise RequestTimeoutError(f"Failed to {action}: no response within {timeout:g}s")
+
+    async def _request_with_retries(
+        self,
+        contents: list,
+        action: str,
+        stream: bool = False,
+        on_text: Optional[Callable[[str], None]] = None,
+        on_first_byte: Optional[Callable[[float], None]] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Call the model with throttling and retries.
+
+        A streamed request is only retried if it failed before any chunk
+        arrived, so callbacks never see the same text twice.
+
+        Args:
+            contents: Request contents
+            action: Short description for error messages, e.g. "edit image"
+            stream: Read the response incrementally
+            on_text: Called with each text part as it arrives (streaming only)
+            on_first_byte: Called with seconds until the first chunk (streaming only)
+
+        Returns:
+            Tuple of (image bytes or None, text response or None)
+
+        Raises:
+            GeminiError: If the request fails and is not (or no longer) retryable
+        """
+        received = []  # non-empty once a streamed chunk has been delivered
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.rate_limiter.slot():
+                    if stream:
+                        return await self._stream_content(
+                            contents, on_text, on_first_byte, received
+                        )
+
+                    response = await self.backend.generate_content(self.MODEL_NAME, contents)
+                    return self._extract_result(response)
+            except Exception as e:
+                error = classify_error(e, action)
+                if received or not self.retry_policy.should_retry(error, attempt):
+                    raise error from e
+
+                delay = self.retry_policy.delay_for(error, attempt)
+                if isinstance(error, RateLimitError):
+                    # Hold back every request sharing the limiter, not just this one
+                    self.rate_limiter.penalize(delay)
+
+                logger.warning(
+                    "Attempt %d to %s failed (%s); retrying in %.1fs",
+                    attempt, action, error, delay
+                )
+
+            # Sleep outside the limiter slot so other requests can use it
+            await asyncio.sleep(delay)
+
+    async def _stream_content(
+        self,
+        contents: list,
+        on_text: Optional[Callable[[str], None]],
+        on_first_byte: Optional[Callable[[float], None]],
+        received: list
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """Read a generate_content_stream response, reporting progress as chunks arrive."""
+        started = time.monotonic()
+        image_bytes = None
+        text_parts = []
+
+        chunks = await self.backend.generate_content_stream(self.MODEL_NAME, contents)
+        async for chunk in chunks:
+            if not received:
+                received.append(chunk)
+                if on_first_byte is not None:
+                    on_first_byte(time.monotonic() - started)
+
+            for part in self._iter_parts(chunk):
+                if part.text is not None:
+                    text_parts.append(part.text)
+                    if on_text is not None:
+                        on_text(part.text)
+                elif part.inline_data is not None:
+                    image_bytes = part.inline_data.data
+
+        return image_bytes, "".join(text_parts) or None
+
+    def _record_upload(self, image_path: Path, upload: PreparedUpload):
+        """Accumulate and log the bytes saved by the pre-upload stage."""
+        self.upload_bytes_original += upload.original_size
+        self.upload_bytes_sent += len(upload.data)
+        logger.info(
+            "Uploading %s as %dx%d %s: %d bytes (saved %d, %s)",
+            image_path.name, upload.width, upload.height, upload.mime_type,
+            len(upload.data), upload.bytes_saved,
+            "transcoded" if upload.transcoded else "original bytes"
+        )
+
+    async def aedit_image(
         self,
         image_path: Path,
         prompt: str,
-        aspect_ratio: Optional[str] = None
-    ) -> Tuple[Image.Image, Optional[str]]:
+        aspect_ratio: Optional[str] = None,
+        stream: bool = False,
+        on_text: Optional[Callable[[str], None]] = None,
+        on_first_byte: Optional[Callable[[float], None]] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[EncodedImage, Optional[str]]:
         """
         Edit an image using Gemini's image-to-image capabilities.
 
@@ -75,89 +400,195 @@ class GeminiClient:
             prompt: Text prompt describing the desired edits
             aspect_ratio: Optional aspect ratio (e.g., "1:1", "16:9", "9:16", "21:9")
                          If None, uses "sync" (subject resolution)
+            stream: Use generate_content_stream and report progress via the callbacks
+            on_text: Called with each text part as it arrives
+            on_first_byte: Called with seconds until the first response chunk
+            timeout: Deadline in seconds; None uses ``request_timeout``
 
         Returns:
-            Tuple of (edited PIL Image, optional text response from model)
+            Tuple of (edited image as returned by the model, optional text response).
+            Call ``decode()`` on the image for pixels.
 
         Raises:
-            ValueError: If no API key is configured
+            MissingApiKeyError: If no API key is configured
             FileNotFoundError: If image file doesn't exist
-            Exception: If API call fails
+            RequestTimeoutError: If the deadline passes
+            GeminiError: If API call fails
         """
         if not self.has_api_key():
-            raise ValueError("No API key configured. Please set your Gemini API key first.")
+            raise MissingApiKeyError("No API key configured. Please set your Gemini API key first.")
 
+        image_path = Path(image_path)
         if not image_path.exists():
             raise FileNotFoundError(f"Image file not found: {image_path}")
 
-        # Load the input image
-        input_image = Image.open(image_path)
+        # Read the input once; the bytes feed both the cache key and the request
+        image_bytes = await asyncio.to_thread(image_path.read_bytes)
+
+        request_key = ResponseCache.make_key(
+            image_bytes, prompt, self.MODEL_NAME, aspect_ratio,
+            self.upload_options.cache_tag()
+        )
+
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, request_key)
+            if cached is not None:
+                cached_bytes, text_response = cached
+                if text_response and on_text is not None:
+                    on_text(text_response)
+                return EncodedImage(cached_bytes), text_response
+
+        result_bytes, text_response = await self._coalesce(
+            request_key,
+            lambda: self._fetch_edit(
+                image_path, image_bytes, prompt, request_key, timeout,
+                stream=stream, on_text=on_text, on_first_byte=on_first_byte
+            )
+        )
+
+        # Keep the model's encoding; callers decode only what they display
+        return EncodedImage(result_bytes), text_response
+
+    async def _coalesce(self, key: str, start: Callable[[], Awaitable[T]]) -> T:
+        """
+        Join an identical in-flight request, or start one with ``start``.
+
+        The shared request is only cancelled once every caller waiting on it
+        has been cancelled. Callers that join an existing request don't get
+        streaming callbacks; they receive the final result.
+
+        Args:
+            key: Identity of the request
+            start: Factory for the coroutine that performs it
+
+        Returns:
+            The request's result
+        """
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(key)
+
+        if inflight is None or inflight.task.get_loop() is not loop:
+            inflight = _InflightRequest(loop.create_task(start()))
+            self._inflight[key] = inflight
+
+            def forget(task, key=key, inflight=inflight):
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+
+            inflight.task.add_done_callback(forget)
+        else:
+            self.coalesced_requests += 1
+            logger.info("Joining in-flight request %s", key[:12])
+
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        except asyncio.CancelledError:
+            inflight.waiters -= 1
+            if inflight.waiters == 0:
+                inflight.task.cancel()
+            raise
+
+    async def _fetch_edit(
+        self,
+        image_path: Path,
+        image_bytes: bytes,
+        prompt: str,
+        request_key: str,
+        timeout: Optional[float],
+        **kwargs
+    ) -> Tuple[bytes, Optional[str]]:
+        """Upload, request and cache one edit, returning the raw image bytes and text."""
+        # Downscale and re-encode the input off the event loop
+        upload = await asyncio.to_thread(prepare_upload, image_bytes, self.upload_options)
+        self._record_upload(image_path, upload)
 
         # Prepare the request
-        contents = [prompt, input_image]
+        from google.genai import types
+        contents = [prompt, types.Part.from_bytes(data=upload.data, mime_type=upload.mime_type)]
 
         # TODO: Add aspect ratio support once we understand the API parameter
         # The API docs don't show aspect ratio in the Python SDK examples
         # May need to add this as a parameter or in generation_config
 
-        try:
-            # Make the API request
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME,
-                contents=contents,
-            )
-
-            # Extract the generated image and any text response
-            generated_image = None
-            text_response = None
+        result_bytes, text_response = await self._request_image(
+            contents, "edit image", timeout=timeout, **kwargs
+        )
 
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    text_response = part.text
-                elif part.inline_data is not None:
-                    # Convert the inline data to a PIL Image
-                    generated_image = Image.open(BytesIO(part.inline_data.data))
+        if result_bytes is None:
+            raise NoImageError(self._no_image_message("edit image", text_response))
 
-            if generated_image is None:
-                raise Exception("No image generated in response")
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, request_key, result_bytes, text_response)
 
-            return generated_image, text_response
+        return result_bytes, text_response
 
-        except Exception as e:
-            raise Exception(f"Failed to edit image: {e}")
-
-    def generate_image(self, prompt: str) -> Tuple[Image.Image, Optional[str]]:
+    async def agenerate_image(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None
+    ) -> Tuple[EncodedImage, Optional[str]]:
         """
         Generate an image from text (text-to-image).
 
         Args:
             prompt: Text description of the image to generate
+            timeout: Deadline in seconds; None uses ``request_timeout``
 
         Returns:
-            Tuple of (generated PIL Image, optional text response)
+            Tuple of (generated image as returned by the model, optional text response)
+
+        Raises:
+            MissingApiKeyError: If no API key is configured
+            RequestTimeoutError: If the deadline passes
+            GeminiError: If API call fails
         """
         if not self.has_api_key():
-            raise ValueError("No API key configured. Please set your Gemini API key first.")
+            raise MissingApiKeyError("No API key configured. Please set your Gemini API key first.")
 
-        try:
-            response = self.client.models.generate_content(
-                model=self.MODEL_NAME,
-                contents=[prompt],
-            )
+        result_bytes, text_response = await self._request_image(
+            [prompt], "generate image", timeout=timeout
+        )
 
-            generated_image = None
-            text_response = None
+        if result_bytes is None:
+            raise NoImageError(self._no_image_message("generate image", text_response))
 
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    text_response = part.text
-                elif part.inline_data is not None:
-                    generated_image = Image.open(BytesIO(part.inline_data.data))
+        return EncodedImage(result_bytes), text_response
 
-            if generated_image is None:
-                raise Exception("No image generated in response")
+    def submit_edit(
+        self,
+        image_path: Path,
+        prompt: str,
+        aspect_ratio: Optional[str] = None,
+        **kwargs
+    ) -> "Future[Tuple[EncodedImage, Optional[str]]]":
+        """
+        Schedule ``aedit_image`` on the background loop and return its future.
 
-            return generated_image, text_response
+        Extra keyword arguments (``stream``, ``on_text``, ...) are passed through.
+        """
+        return self.submit(
+            self.aedit_image(image_path, prompt, aspect_ratio=aspect_ratio, **kwargs)
+        )
 
-        except Exception as e:
-            raise Exception(f"Failed to generate image: {e}")
+    def submit_generate(
+        self,
+        prompt: str,
+        **kwargs
+    ) -> "Future[Tuple[EncodedImage, Optional[str]]]":
+        """Schedule ``agenerate_image`` on the background loop and return its future."""
+        return self.submit(self.agenerate_image(prompt, **kwargs))
+
+    def edit_image(
+        self,
+        image_path: Path,
+        prompt: str,
+        aspect_ratio: Optional[str] = None,
+        **kwargs
+    ) -> Tuple[EncodedImage, Optional[str]]:
+        """Blocking wrapper around ``aedit_image``."""
+        return self.submit_edit(image_path, prompt, aspect_ratio=aspect_ratio, **kwargs).result()
+
+    def generate_image(self, prompt: str, **kwargs) -> Tuple[EncodedImage, Optional[str]]:
+        """Blocking wrapper around ``agenerate_image``."""
+        return self.submit_generate(prompt, **kwargs).result()
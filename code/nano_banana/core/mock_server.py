@@ -0,0 +1,290 @@
+"""Local stand-in for the Gemini generate_content endpoint, for offline load testing."""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Optional, Sequence
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import threading
+import time
+from PIL import Image
+
+# Matches /v1beta/models/<model>:generateContent and :streamGenerateContent
+ROUTE_PATTERN = re.compile(
+    r"^/[^/]+/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)"
+)
+
+ERROR_STATUSES = {
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+class MockGeminiServer:
+    """
+    HTTP server mimicking the image responses of ``generate_content``.
+
+    Every request is answered after ``latency`` seconds (plus up to
+    ``latency_jitter``) with a text part and a PNG of roughly
+    ``payload_bytes``. A fraction ``error_rate`` of requests fail instead
+    with one of ``error_codes``, using the API's JSON error format.
+
+    Streamed requests (``streamGenerateContent``) get the text chunk after a
+    fifth of the latency and the image chunk at the end, as server-sent
+    events, so time-to-first-byte can be observed.
+
+    Clients that hang up before their response is complete (timeouts,
+    cancellations) are counted in ``stats["disconnects"]``.
+    """
+
+    STREAM_FIRST_CHUNK_FRACTION = 0.2
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.5,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: Sequence[int] = (429, 503),
+        payload_bytes: int = 1_000_000,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the server (call ``start()`` to begin serving).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind; 0 picks a free one
+            latency: Seconds before each response
+            latency_jitter: Extra random delay of up to this many seconds
+            error_rate: Fraction of requests (0-1) answered with an error
+            error_codes: HTTP status codes to choose from for injected errors
+            payload_bytes: Approximate size of the returned image
+            seed: Random seed for reproducible error injection
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.image_data = self._make_payload(payload_bytes)
+
+        self.stats = {
+            "requests": 0, "errors": 0, "disconnects": 0, "bytes_received": 0, "bytes_sent": 0
+        }
+        self._stats_lock = threading.Lock()
+        self._random = random.Random(seed)
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _make_payload(payload_bytes: int) -> bytes:
+        """Encode a PNG of noise, which doesn't compress, so its size tracks payload_bytes."""
+        side = max(1, int(math.sqrt(payload_bytes / 3)))
+        noise = random.Random(0).randbytes(side * side * 3)
+        buffer = BytesIO()
+        Image.frombytes("RGB", (side, side), noise).save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to the SDK."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockGeminiServer":
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-gemini", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _pick_error(self) -> Optional[int]:
+        with self._stats_lock:
+            if self.error_codes and self._random.random() < self.error_rate:
+                return self._random.choice(self.error_codes)
+        return None
+
+    def _delay(self) -> float:
+        with self._stats_lock:
+            return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def _chunks(self, model: str) -> list:
+        """Build the response as a list of chunks: text first, then the image."""
+        text_chunk = {"candidates": [{
+            "content": {"role": "model", "parts": [{"text": "Here is the edited image (mock)."}]},
+            "index": 0,
+        }]}
+        image_chunk = {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"inlineData": {
+                    "mimeType": "image/png",
+                    "data": base64.b64encode(self.image_data).decode("ascii"),
+                }}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "modelVersion": model,
+        }
+        return [text_chunk, image_chunk]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(
+                self,
+                status: int,
+                body: bytes,
+                content_type: str,
+                headers: Optional[dict] = None
+            ):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._record(bytes_sent=len(body))
+
+            def _stream(self, chunks: list, remaining_delay: float):
+                """Send chunks as server-sent events, pausing before the last one."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for index, chunk in enumerate(chunks):
+                    if index == len(chunks) - 1:
+                        time.sleep(remaining_delay)
+                    event = f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8")
+                    self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+                    self.wfile.flush()
+                    server._record(bytes_sent=len(event))
+
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_POST(self):
+                try:
+                    self._handle_post()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. on a timeout; routine in load tests
+                    server._record(disconnects=1)
+                    self.close_connection = True
+
+            def _handle_post(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                server._record(requests=1, bytes_received=length)
+
+                match = ROUTE_PATTERN.match(self.path)
+                if not match:
+                    body = json.dumps({"error": {
+                        "code": 404, "message": "Not found", "status": "NOT_FOUND"
+                    }})
+                    self._send(404, body.encode("utf-8"), "application/json")
+                    return
+
+                delay = server._delay()
+                streaming = match.group("method") == "streamGenerateContent"
+                time.sleep(delay * server.STREAM_FIRST_CHUNK_FRACTION if streaming else delay)
+
+                error_code = server._pick_error()
+                if error_code is not None:
+                    server._record(errors=1)
+                    body = json.dumps({"error": {
+                        "code": error_code,
+                        "message": "Injected error from mock server",
+                        "status": ERROR_STATUSES.get(error_code, "UNKNOWN"),
+                    }})
+                    self._send(error_code, body.encode("utf-8"), "application/json")
+                    return
+
+                chunks = server._chunks(match.group("model"))
+                if streaming:
+                    self._stream(chunks, delay * (1 - server.STREAM_FIRST_CHUNK_FRACTION))
+                else:
+                    merged = chunks[-1]
+                    merged["candidates"][0]["content"]["parts"] = [
+                        part
+                        for chunk in chunks
+                        for part in chunk["candidates"][0]["content"]["parts"]
+                    ]
+                    self._send(200, json.dumps(merged).encode("utf-8"), "application/json")
+
+        return Handler
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Run a mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini image API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="extra random seconds")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of requests to fail"
+    )
+    parser.add_argument(
+        "--payload-bytes", type=int, default=1_000_000, help="approximate image size"
+    )
+    args = parser.parse_args(argv)
+
+    server = MockGeminiServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        payload_bytes=args.payload_bytes,
+    )
+    print(f"Mock Gemini server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
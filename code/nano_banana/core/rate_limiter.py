@@ -0,0 +1,160 @@
+"""Request throttling and retry policy for the Gemini client."""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncio
+import random
+import threading
+import time
+import weakref
+
+from .errors import GeminiError
+
+
+class RateLimiter:
+    """
+    Shared limiter combining a token bucket (requests per minute) with a cap
+    on concurrent requests.
+
+    One limiter can be shared by several clients so that a bulk run spreads
+    requests evenly across the quota instead of bursting into 429s. After a
+    rate-limit response, ``penalize`` pauses every caller, not just the one
+    that was rejected.
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        burst: Optional[int] = None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Sustained request rate, or None for no rate limit
+            max_concurrency: Maximum requests in flight per event loop
+            burst: Bucket capacity; defaults to ``max_concurrency``
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if requests_per_minute is not None and requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.capacity = float(burst or max_concurrency)
+
+        # Token state is guarded by a thread lock so the limiter works across loops
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+        # asyncio.Semaphore is loop-bound, so keep one per event loop
+        self._semaphores: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+        ) = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; otherwise return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            if self.requests_per_minute is None:
+                return 0.0
+
+            rate = self.requests_per_minute / 60.0
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / rate
+
+    async def acquire_token(self):
+        """Wait until the bucket allows another request."""
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a concurrency slot and a rate token for the duration of one request."""
+        async with self._get_semaphore():
+            await self.acquire_token()
+            yield
+
+    def penalize(self, seconds: float):
+        """
+        Pause all callers after the server reported a rate limit.
+
+        Args:
+            seconds: How long no new requests should start
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for retryable Gemini errors."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 32.0):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total attempts including the first one
+            base_delay: Delay before the first retry, doubled on each attempt
+            max_delay: Upper bound on computed backoff delays
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error: GeminiError, attempt: int) -> bool:
+        """Check whether another attempt should follow failed attempt number ``attempt``."""
+        return error.retryable and attempt < self.max_attempts
+
+    def delay_for(self, error: GeminiError, attempt: int) -> float:
+        """
+        Get the delay before the next attempt.
+
+        A server-provided retry delay is honoured when present. Otherwise the
+        delay doubles per attempt, with half of it randomised so that many
+        clients backing off together don't retry in lockstep.
+
+        Args:
+            error: The error from the failed attempt
+            attempt: Number of the attempt that failed (1-based)
+
+        Returns:
+            Delay in seconds
+        """
+        if error.retry_after is not None:
+            return error.retry_after
+
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
@@ -0,0 +1,195 @@
+"""Content-addressed on-disk cache for Gemini image responses."""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+from ..utils.paths import get_cache_dir
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of model responses, stored on disk.
+
+    Entries are keyed by a hash of everything that determines the request
+    (input image bytes, final prompt, model and aspect ratio). Each entry is a
+    pair of files: ``<key>.bin`` holds the raw image bytes returned by the
+    model and ``<key>.json`` holds the text response. The JSON file is written
+    last, so an entry only counts once it is complete.
+
+    Recency is tracked with file modification times, so the LRU order survives
+    restarts. When the total size exceeds ``max_bytes`` the least recently used
+    entries are removed.
+    """
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Cache directory. Defaults to the per-user cache location.
+            max_bytes: Maximum total size of all entries before eviction
+        """
+        self.directory = Path(directory) if directory else get_cache_dir("responses")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(
+        image_bytes: bytes,
+        prompt: str,
+        model: str,
+        aspect_ratio: Optional[str],
+        *extra: str
+    ) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            image_bytes: Encoded bytes of the input image
+            prompt: Final prompt sent to the model
+            model: Model name
+            aspect_ratio: Requested aspect ratio, or None
+            *extra: Any other request settings that change the result
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(image_bytes).digest())
+        for field in (prompt, model, aspect_ratio or "", *extra):
+            encoded = field.encode("utf-8")
+            # Length-prefix each field so different splits can't collide
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _data_path(self, key: str) -> Path:
+        return self.directory / f"{key}.bin"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU order from the files on disk."""
+        found = []
+        for meta_path in self.directory.glob("*.json"):
+            data_path = meta_path.with_suffix(".bin")
+            try:
+                meta_stat = meta_path.stat()
+                data_stat = data_path.stat()
+            except OSError:
+                continue
+            size = meta_stat.st_size + data_stat.st_size
+            found.append((meta_stat.st_mtime, meta_path.stem, size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from ``make_key``
+
+        Returns:
+            Tuple of (image bytes, optional text response), or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            try:
+                meta = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+                data = self._data_path(key).read_bytes()
+            except (OSError, ValueError):
+                # Entry vanished or is corrupt; treat it as a miss
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            try:
+                os.utime(self._meta_path(key))
+            except OSError:
+                pass
+
+            self.hits += 1
+            return data, meta.get("text")
+
+    def put(self, key: str, image_bytes: bytes, text: Optional[str] = None):
+        """
+        Store a response and evict old entries if over budget.
+
+        Args:
+            key: Key from ``make_key``
+            image_bytes: Raw image bytes returned by the model
+            text: Optional text response
+        """
+        meta = json.dumps({"text": text}).encode("utf-8")
+        size = len(image_bytes) + len(meta)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._write_atomic(self._data_path(key), image_bytes)
+            self._write_atomic(self._meta_path(key), meta)
+
+            self._entries[key] = size
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: str):
+        """Drop an entry from disk and the index. Caller must hold the lock."""
+        self._total_bytes -= self._entries.pop(key, 0)
+        for path in (self._meta_path(key), self._data_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Write a file via a temporary name so readers never see partial data."""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,172 @@
+"""Preparation of input images before they are uploaded to Gemini."""
+
+from io import BytesIO
+from typing import Optional
+from PIL import Image, ImageOps
+
+
+class UploadOptions:
+    """Settings for the pre-upload downscale and re-encode stage."""
+
+    # Gemini returns images of roughly 1024px, so larger inputs mostly cost bandwidth
+    DEFAULT_MAX_EDGE = 1536
+    SUPPORTED_FORMATS = ("JPEG", "WEBP")
+
+    def __init__(
+        self,
+        max_edge: Optional[int] = DEFAULT_MAX_EDGE,
+        format: str = "JPEG",
+        quality: int = 90,
+        passthrough: bool = True
+    ):
+        """
+        Initialize upload options.
+
+        Args:
+            max_edge: Longest edge in pixels sent to the model, or None to keep full size
+            format: Encoding for the uploaded image ("JPEG" or "WEBP")
+            quality: Encoder quality (1-100)
+            passthrough: Send the original file bytes when no resize is needed
+        """
+        format = format.upper()
+        if format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported upload format: {format}")
+        if not 1 <= quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+        if max_edge is not None and max_edge < 1:
+            raise ValueError("max_edge must be positive")
+
+        self.max_edge = max_edge
+        self.format = format
+        self.quality = quality
+        self.passthrough = passthrough
+
+    def cache_tag(self) -> str:
+        """Describe these options for inclusion in cache keys."""
+        return f"{self.max_edge}:{self.format}:{self.quality}:{int(self.passthrough)}"
+
+    def __repr__(self) -> str:
+        return (
+            f"UploadOptions(max_edge={self.max_edge}, format='{self.format}', "
+            f"quality={self.quality}, passthrough={self.passthrough})"
+        )
+
+
+class PreparedUpload:
+    """An encoded image ready to be sent, with size bookkeeping."""
+
+    def __init__(
+        self,
+        data: bytes,
+        mime_type: str,
+        original_size: int,
+        width: int,
+        height: int,
+        transcoded: bool = True
+    ):
+        self.data = data
+        self.mime_type = mime_type
+        self.original_size = original_size
+        self.width = width
+        self.height = height
+        self.transcoded = transcoded
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes not uploaded compared with sending the original file."""
+        return self.original_size - len(self.data)
+
+    def __repr__(self) -> str:
+        return (
+            f"PreparedUpload({self.width}x{self.height}, {self.mime_type}, "
+            f"{len(self.data)} bytes, saved {self.bytes_saved}, transcoded={self.transcoded})"
+        )
+
+
+# Formats the API accepts as-is, by PIL format name
+PASSTHROUGH_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+# EXIF tag holding the camera orientation
+EXIF_ORIENTATION = 0x0112
+
+
+def prepare_upload(image_bytes: bytes, options: UploadOptions) -> PreparedUpload:
+    """
+    Downscale and re-encode an image for upload.
+
+    If ``options.passthrough`` is set and the source is already small enough,
+    upright and in a format the API accepts, its bytes are returned untouched
+    without decoding any pixels.
+
+    Otherwise the long edge is capped at ``options.max_edge`` and the result is
+    encoded with ``options.format``. JPEG sources are decoded at reduced scale
+    via ``draft()`` when possible, and EXIF orientation is applied so it is not
+    lost with the metadata.
+
+    Args:
+        image_bytes: Encoded bytes of the source image
+        options: Upload settings
+
+    Returns:
+        PreparedUpload holding the encoded bytes and sizes
+    """
+    # Image.open only parses the header; pixels are decoded on first access
+    image = Image.open(BytesIO(image_bytes))
+
+    if options.passthrough and _can_pass_through(image, options):
+        return PreparedUpload(
+            data=image_bytes,
+            mime_type=PASSTHROUGH_MIME_TYPES[image.format],
+            original_size=len(image_bytes),
+            width=image.width,
+            height=image.height,
+            transcoded=False,
+        )
+
+    if options.max_edge is not None and image.format == "JPEG":
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still covers max_edge
+        image.draft("RGB", (options.max_edge, options.max_edge))
+
+    image = ImageOps.exif_transpose(image)
+
+    if options.max_edge is not None and max(image.size) > options.max_edge:
+        image.thumbnail((options.max_edge, options.max_edge), Image.Resampling.LANCZOS)
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    output_format = options.format
+    if has_alpha and output_format == "JPEG":
+        # JPEG can't carry transparency; lossy WebP can
+        output_format = "WEBP"
+
+    if has_alpha:
+        image = image.convert("RGBA")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, output_format, quality=options.quality)
+
+    return PreparedUpload(
+        data=buffer.getvalue(),
+        mime_type=f"image/{output_format.lower()}",
+        original_size=len(image_bytes),
+        width=image.width,
+        height=image.height,
+    )
+
+
+def _can_pass_through(image: Image.Image, options: UploadOptions) -> bool:
+    """Check whether an opened (but not decoded) image can be sent as-is."""
+    if image.format not in PASSTHROUGH_MIME_TYPES:
+        return False
+
+    if options.max_edge is not None and max(image.size) > options.max_edge:
+        return False
+
+    # The model may ignore EXIF, so rotated sources go through exif_transpose
+    orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+    return orientation == 1
@@ -39,7 +39,7 @@ class ApiKeyDialog(QDialog):
         self.api_key_input.setEchoMode(QLineEdit.Password)
 
         # Load existing key if available
-        if self.gemini_client and self.gemini_client.api_key:
+        if self.gemini_client and self.gemini_client.has_api_key() and self.gemini_client.api_key:
             self.api_key_input.setText(self.gemini_client.api_key)
 
         layout.addWidget(self.api_key_input)
@@ -0,0 +1,75 @@
+"""Run plain functions on a thread pool and report back on the GUI thread."""
+
+from itertools import count
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class _TaskSignals(QObject):
+    """Signals for tasks (QRunnable can't define its own)."""
+
+    finished = Signal(int, object)  # (task id, return value)
+    failed = Signal(int, str)  # (task id, error message)
+
+
+class _Task(QRunnable):
+    """Call one function on the thread pool."""
+
+    def __init__(self, signals: _TaskSignals, task_id: int, function: Callable, args: tuple):
+        super().__init__()
+        self.signals = signals
+        self.task_id = task_id
+        self.function = function
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.task_id, str(e))
+            return
+        self.signals.finished.emit(self.task_id, result)
+
+
+class TaskRunner(QObject):
+    """
+    Runs functions on a thread pool.
+
+    Every ``submit`` returns an id that is passed back with ``finished`` or
+    ``failed``, delivered on the thread the runner lives in, so callers can
+    drop results they no longer need.
+    """
+
+    finished = Signal(int, object)  # (task id, return value)
+    failed = Signal(int, str)  # (task id, error message)
+
+    def __init__(self, thread_pool: Optional[QThreadPool] = None, parent=None):
+        """
+        Initialize the runner.
+
+        Args:
+            thread_pool: Pool to run tasks on; defaults to the global pool
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._ids = count(1)
+        self._signals = _TaskSignals(self)
+        self._signals.finished.connect(self.finished)
+        self._signals.failed.connect(self.failed)
+
+    def submit(self, function: Callable, *args) -> int:
+        """
+        Start ``function(*args)`` on the pool.
+
+        Args:
+            function: Callable to run; it must not touch GUI objects
+            *args: Arguments to call it with
+
+        Returns:
+            Task id
+        """
+        task_id = next(self._ids)
+        self.thread_pool.start(_Task(self._signals, task_id, function, args))
+        return task_id
@@ -0,0 +1,240 @@
+"""App-wide queue of image edit jobs."""
+
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError
+from typing import Deque, Optional, Set
+
+from PySide6.QtCore import Qt, QObject, Signal
+
+from ..core.gemini_client import GeminiClient
+
+
+class EditJob(QObject):
+    """
+    One image edit, queued in an ``EditScheduler`` and run on the Gemini
+    client's event loop.
+
+    The response is streamed: ``first_byte`` and ``text_received`` fire as
+    chunks arrive, and ``finished`` / ``error`` / ``cancelled`` when the
+    job ends. ``state_changed`` reports every transition. All signals are
+    delivered on the GUI thread.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+    state_changed = Signal(str)
+    finished = Signal(object, str)  # (EncodedImage, text_response)
+    error = Signal(str)
+    cancelled = Signal()
+    first_byte = Signal(float)  # seconds until the first response chunk
+    text_received = Signal(str)  # a text part from the model
+
+    # Emitted from the client's event loop thread and re-emitted on the GUI thread
+    _completed = Signal(object)  # concurrent.futures.Future
+    _first_byte = Signal(float)
+    _text_received = Signal(str)
+
+    def __init__(
+        self,
+        gemini_client: GeminiClient,
+        image_path,
+        prompt: str,
+        aspect_ratio: str = "preserve",
+        owner=None
+    ):
+        super().__init__()
+        self.gemini_client = gemini_client
+        self.image_path = image_path
+        self.prompt = prompt
+        self.aspect_ratio = aspect_ratio
+        self.owner = owner
+        self.state = self.QUEUED
+        self.streamed_text = ""
+        self.first_byte_after: Optional[float] = None  # seconds, once the response started
+        self.future = None
+
+        # Queue callbacks onto the thread this job lives in (the GUI thread)
+        self._completed.connect(self._on_completed, Qt.QueuedConnection)
+        self._first_byte.connect(self._on_first_byte, Qt.QueuedConnection)
+        self._text_received.connect(self._on_text, Qt.QueuedConnection)
+
+    def _set_state(self, state: str):
+        self.state = state
+        self.state_changed.emit(state)
+
+    def start(self):
+        """Submit the edit to the client (called by the scheduler)."""
+        # Convert aspect ratio to API parameter if needed
+        api_aspect_ratio = None if self.aspect_ratio == "preserve" else self.aspect_ratio
+
+        self._set_state(self.RUNNING)
+        self.future = self.gemini_client.submit_edit(
+            self.image_path,
+            self.prompt,
+            aspect_ratio=api_aspect_ratio,
+            stream=True,
+            on_text=self._text_received.emit,
+            on_first_byte=self._first_byte.emit
+        )
+        self.future.add_done_callback(self._completed.emit)
+
+    def cancel(self):
+        """Cancel the job, whether it is still queued or already running."""
+        if self.state == self.QUEUED:
+            self._set_state(self.CANCELLED)
+            self.cancelled.emit()
+        elif self.state == self.RUNNING and self.future is not None:
+            # The request's concurrency slot is released immediately
+            self.future.cancel()
+
+    def _on_first_byte(self, seconds: float):
+        self.first_byte_after = seconds
+        self.first_byte.emit(seconds)
+
+    def _on_text(self, text: str):
+        self.streamed_text += text
+        self.text_received.emit(text)
+
+    def _on_completed(self, future):
+        """Forward the finished request to the public signals."""
+        try:
+            result_image, text_response = future.result()
+        except CancelledError:
+            self._set_state(self.CANCELLED)
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self._set_state(self.FAILED)
+            self.error.emit(str(e))
+            return
+
+        self._set_state(self.DONE)
+        self.finished.emit(result_image, text_response or "")
+
+
+class EditScheduler(QObject):
+    """
+    Runs edit jobs from all tabs through a bounded number of slots.
+
+    Each owner (normally an ``ImageEditorTab``) has its own FIFO queue. When
+    a slot frees up, the foreground owner's queue is served first; the
+    other queues take turns, so one tab with many queued edits can't starve
+    the rest.
+    """
+
+    DEFAULT_MAX_RUNNING = 4
+
+    job_state_changed = Signal(object)  # EditJob
+    counts_changed = Signal(int, int)  # (running, queued)
+
+    def __init__(
+        self,
+        gemini_client: GeminiClient,
+        max_running: int = DEFAULT_MAX_RUNNING,
+        parent=None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            gemini_client: Client that performs the edits
+            max_running: Maximum number of edits in flight at once
+            parent: Parent QObject
+        """
+        if max_running < 1:
+            raise ValueError("max_running must be at least 1")
+
+        super().__init__(parent)
+        self.gemini_client = gemini_client
+        self.max_running = max_running
+        self.foreground = None
+        # Per-owner queues in turn order, the owner to serve next first
+        self._queues: "OrderedDict[object, Deque[EditJob]]" = OrderedDict()
+        self._running: Set[EditJob] = set()
+
+    @property
+    def running_count(self) -> int:
+        """Number of edits in flight."""
+        return len(self._running)
+
+    @property
+    def queued_count(self) -> int:
+        """Number of edits waiting for a slot."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def submit(self, owner, image_path, prompt: str, aspect_ratio: str = "preserve") -> EditJob:
+        """
+        Queue an edit.
+
+        Args:
+            owner: Queue the job belongs to (the requesting tab)
+            image_path: Image to edit
+            prompt: Edit prompt
+            aspect_ratio: Output aspect ratio setting
+
+        Returns:
+            The queued job
+        """
+        job = EditJob(self.gemini_client, image_path, prompt, aspect_ratio, owner=owner)
+        job.state_changed.connect(lambda state, job=job: self._on_job_state(job, state))
+        self._queues.setdefault(owner, deque()).append(job)
+        self.job_state_changed.emit(job)
+        self._dispatch()
+        self._emit_counts()
+        return job
+
+    def set_foreground(self, owner):
+        """Give an owner's queue priority, e.g. when its tab is selected."""
+        self.foreground = owner
+        self._dispatch()
+
+    def cancel_owner(self, owner):
+        """Cancel every queued and running job of an owner, e.g. when its tab closes."""
+        for job in list(self._queues.get(owner, ())):
+            job.cancel()
+        for job in list(self._running):
+            if job.owner is owner:
+                job.cancel()
+        self._queues.pop(owner, None)
+        if self.foreground is owner:
+            self.foreground = None
+
+    def _next_job(self) -> Optional[EditJob]:
+        """Take the next job: the foreground owner's first, then round robin."""
+        queue = self._queues.get(self.foreground)
+        if queue:
+            return queue.popleft()
+
+        for owner, queue in list(self._queues.items()):
+            if queue:
+                self._queues.move_to_end(owner)
+                return queue.popleft()
+        return None
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free."""
+        while len(self._running) < self.max_running:
+            job = self._next_job()
+            if job is None:
+                break
+            self._running.add(job)
+            job.start()
+
+    def _on_job_state(self, job: EditJob, state: str):
+        if state in EditJob.FINAL_STATES:
+            self._running.discard(job)
+            queue = self._queues.get(job.owner)
+            if queue is not None and job in queue:
+                queue.remove(job)
+            self._dispatch()
+
+        self.job_state_changed.emit(job)
+        self._emit_counts()
+
+    def _emit_counts(self):
+        self.counts_changed.emit(self.running_count, self.queued_count)
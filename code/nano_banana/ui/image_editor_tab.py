@@ -3,59 +3,80 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QScrollArea, QTextEdit, QSplitter, QGroupBox, QMessageBox,
-    QProgressDialog
+    QListWidget, QListWidgetItem
 )
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtCore import Qt, QSize, Signal
+from PySide6.QtGui import QPixmap
 from pathlib import Path
+from typing import Optional
 from PIL import Image
 
+from . import qt_images
+from .edit_scheduler import EditJob, EditScheduler
+from .image_loader import ImageLoader
+from .image_viewer import ImageViewer, PyramidCache
 from .prompt_selector import PromptSelector
+from .version_strip import VersionListModel, VersionStrip
+from ..core.encoded_image import EncodedImage
 from ..core.gemini_client import GeminiClient
-from ..utils.file_manager import FileManager
-
-
-class ImageEditWorker(QThread):
-    """Worker thread for image editing to prevent UI freezing."""
-
-    finished = Signal(object, str)  # (PIL Image, text_response)
-    error = Signal(str)
-
-    def __init__(self, gemini_client, image_path, prompt, aspect_ratio="preserve"):
-        super().__init__()
-        self.gemini_client = gemini_client
-        self.image_path = image_path
-        self.prompt = prompt
-        self.aspect_ratio = aspect_ratio
-
-    def run(self):
-        """Run the image editing task."""
-        try:
-            # Convert aspect ratio to API parameter if needed
-            api_aspect_ratio = None if self.aspect_ratio == "preserve" else self.aspect_ratio
-
-            result_image, text_response = self.gemini_client.edit_image(
-                self.image_path,
-                self.prompt,
-                aspect_ratio=api_aspect_ratio
-            )
-            self.finished.emit(result_image, text_response or "")
-        except Exception as e:
-            self.error.emit(str(e))
+from ..utils.background_writer import BackgroundWriter
+from ..utils.file_manager import FileManager, StorageOptions
+from ..utils.thumbnail_cache import ThumbnailCache
 
 
 class ImageEditorTab(QWidget):
-    """Tab widget for editing a single image."""
-
-    def __init__(self, image_path: Path, gemini_client: GeminiClient, parent=None, aspect_ratio: str = "preserve"):
+    """
+    Tab widget for editing a single image.
+
+    Edits are queued on an ``EditScheduler`` shared by all tabs, so several
+    can be queued while the user keeps working; the "Edit Queue" list shows
+    each one's state. Every finished edit becomes a new latest version.
+
+    New versions are shown straight from memory; encoding and writing them
+    to disk happens on a ``BackgroundWriter``. ``version_saved`` /
+    ``version_save_failed`` report when that finishes.
+    """
+
+    MAX_FINISHED_JOBS = 10  # finished edits kept in the queue list
+
+    memory_changed = Signal()  # decoded image data was added
+    version_saved = Signal(int, str)  # (version number, path)
+    version_save_failed = Signal(int, str)  # (version number, error message)
+    _save_finished = Signal(int, object)  # emitted from the writer thread
+
+    def __init__(
+        self,
+        image_path: Path,
+        gemini_client: GeminiClient,
+        parent=None,
+        aspect_ratio: str = "preserve",
+        version_writer: BackgroundWriter = None,
+        storage_options: StorageOptions = None,
+        thumbnail_cache: ThumbnailCache = None,
+        scheduler: EditScheduler = None,
+        file_manager: FileManager = None
+    ):
         super().__init__(parent)
         self.original_image_path = image_path
         self.gemini_client = gemini_client
-        self.file_manager = FileManager(image_path)
-        self.current_version = 0  # 0 = original
-        self.worker = None
+        self.file_manager = file_manager or FileManager(image_path, storage_options)
+        self.version_writer = version_writer or BackgroundWriter(name="version-writer")
+        self.pending_saves = {}  # version number -> Future of the background save
+        self.current_version = 0  # 0 = original; the version on screen and edited next
+        self.latest_version = self.file_manager.get_latest_version_number()
+        self.version_model = VersionListModel(self.file_manager, thumbnail_cache, parent=self)
+        self.pyramids = PyramidCache()  # recently shown versions, ready for switching back
+        self.image_loader = ImageLoader(parent=self)
+        self.image_loader.decoded.connect(self.on_image_decoded)
+        self.image_loader.failed.connect(self.on_image_decode_failed)
+        self.load_request = None  # (request id, version number) of the awaited decode
+        self.hibernated = False  # decoded data released while in the background
+        self.scheduler = scheduler or EditScheduler(gemini_client, parent=self)
+        self.job_items = {}  # EditJob -> QListWidgetItem, in submission order
         self.aspect_ratio = aspect_ratio
 
+        self._save_finished.connect(self.on_save_finished, Qt.QueuedConnection)
+
         self.setup_ui()
         self.load_original_image()
 
@@ -67,10 +88,9 @@ class ImageEditorTab(QWidget):
         left_splitter = QSplitter(Qt.Vertical)
 
         # Main image viewer
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label = ImageViewer()
         self.image_label.setMinimumSize(400, 400)
-        self.image_label.setScaledContents(False)
+        self.image_label.resolution_needed.connect(self.on_resolution_needed)
 
         scroll_area = QScrollArea()
         scroll_area.setWidget(self.image_label)
@@ -79,12 +99,15 @@ class ImageEditorTab(QWidget):
 
         # Version thumbnails
         version_group = QGroupBox("Versions")
-        version_layout = QHBoxLayout()
+        version_layout = QVBoxLayout()
 
-        # TODO: Add thumbnail grid
         self.version_label = QLabel("Version: Original")
         version_layout.addWidget(self.version_label)
 
+        self.version_strip = VersionStrip(self.version_model)
+        self.version_strip.version_selected.connect(self.show_version)
+        version_layout.addWidget(self.version_strip)
+
         version_group.setLayout(version_layout)
         left_splitter.addWidget(version_group)
 
@@ -122,10 +145,25 @@ class ImageEditorTab(QWidget):
 
         self.discard_button = QPushButton("Discard Last Version")
         self.discard_button.clicked.connect(self.discard_version)
-        self.discard_button.setEnabled(False)
+        self.discard_button.setEnabled(self.latest_version > 0)
         button_layout.addWidget(self.discard_button)
 
         right_layout.addLayout(button_layout)
+
+        # Queued and running edits
+        queue_group = QGroupBox("Edit Queue")
+        queue_layout = QVBoxLayout()
+
+        self.job_list = QListWidget()
+        self.job_list.setWordWrap(True)
+        queue_layout.addWidget(self.job_list)
+
+        self.cancel_job_button = QPushButton("Cancel Selected Edit")
+        self.cancel_job_button.clicked.connect(self.cancel_selected_job)
+        queue_layout.addWidget(self.cancel_job_button)
+
+        queue_group.setLayout(queue_layout)
+        right_layout.addWidget(queue_group)
         right_layout.addStretch()
 
         right_widget.setLayout(right_layout)
@@ -142,26 +180,128 @@ class ImageEditorTab(QWidget):
 
     def load_original_image(self):
         """Load and display the original image."""
-        try:
-            pixmap = QPixmap(str(self.original_image_path))
-            self.display_image(pixmap)
-            self.version_label.setText("Version: Original")
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"Failed to load image: {str(e)}"
-            )
+        if not self.display_cached(0):
+            self.request_image(0, self.preview_size())
+        self.version_label.setText("Version: Original")
+        self.version_strip.select_version(0)
+
+    def show_version(self, version_number: int):
+        """Display a saved version; the next edit starts from it."""
+        if version_number == 0:
+            self.current_version = 0
+            self.load_original_image()
+            return
 
-    def display_image(self, pixmap: QPixmap):
-        """Display an image in the viewer."""
-        # Scale to fit while maintaining aspect ratio
-        scaled_pixmap = pixmap.scaled(
-            self.image_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
+        if not self.display_cached(version_number):
+            if not self.wait_for_save(version_number):
+                return
+            self.request_image(version_number, self.preview_size())
+
+        self.current_version = version_number
+        self.version_label.setText(f"Version: {version_number}")
+        self.version_strip.select_version(version_number)
+
+    def preview_size(self) -> QSize:
+        """Size to decode previews at: the viewer can never be larger than the screen."""
+        return self.screen().availableSize()
+
+    def request_image(self, version_number: int, max_size: QSize = None):
+        """
+        Decode a version in the background; it is displayed when ready.
+
+        Args:
+            version_number: Version to decode
+            max_size: Bounding box for a downscaled preview, or None for full resolution
+        """
+        path = self.file_manager.get_current_version_path(version_number)
+        self.load_request = (self.image_loader.request(path, max_size), version_number)
+
+    def on_image_decoded(self, request_id: int, image, full_size: QSize):
+        """Display a decoded version if it is still the one wanted."""
+        if self.load_request is None or self.load_request[0] != request_id:
+            return
+        version_number = self.load_request[1]
+        self.load_request = None
+        if version_number == self.current_version:
+            self.display_image(QPixmap.fromImage(image), version_number, full_size)
+
+    def on_image_decode_failed(self, request_id: int, error_message: str):
+        """Report a version that couldn't be decoded."""
+        if self.load_request is None or self.load_request[0] != request_id:
+            return
+        self.load_request = None
+        QMessageBox.critical(
+            self,
+            "Error",
+            f"Failed to load image: {error_message}"
         )
-        self.image_label.setPixmap(scaled_pixmap)
+
+    def on_resolution_needed(self, size: QSize):
+        """Replace a preview with the full-resolution decode once the view outgrows it."""
+        if self.load_request is None and not self.hibernated and self.isVisible():
+            self.request_image(self.current_version)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes of decoded image data held by this tab."""
+        shown = self.image_label.pyramid
+        usage = self.pyramids.total_bytes + self.version_model.memory_usage()
+        if shown is not None and not self.pyramids.holds(shown):
+            usage += shown.cost()
+        return usage
+
+    def hibernate(self):
+        """
+        Release all decoded image data while the tab is in the background.
+
+        The viewer keeps a small placeholder; ``rehydrate`` decodes the
+        current version again when the tab is selected.
+        """
+        self.pyramids.shrink(0)
+        self.version_model.release()
+        self.image_label.release()
+        self.load_request = None
+        self.hibernated = True
+
+    def rehydrate(self):
+        """Decode the current version again after ``hibernate``."""
+        if not self.hibernated:
+            return
+        self.hibernated = False
+        self.show_version(self.current_version)
+
+    def release_memory(self, max_bytes: int = 0) -> int:
+        """
+        Shrink the cache of decoded versions; the image on screen stays.
+
+        Args:
+            max_bytes: Size to shrink the cache to; 0 empties it
+
+        Returns:
+            Bytes released
+        """
+        return self.pyramids.shrink(max_bytes)
+
+    def display_image(self, pixmap: QPixmap, version_number: int = None, source_size: QSize = None):
+        """
+        Display an image in the viewer.
+
+        Args:
+            pixmap: Image to show
+            version_number: Version it shows, to keep its pyramid for switching back
+            source_size: Full resolution if ``pixmap`` is a downscaled preview
+        """
+        pyramid = self.image_label.set_image(pixmap, source_size)
+        if version_number is not None:
+            self.pyramids.put(version_number, pyramid)
+        self.memory_changed.emit()
+
+    def display_cached(self, version_number: int) -> bool:
+        """Display a version from the pyramid cache; return False if it isn't cached."""
+        pyramid = self.pyramids.get(version_number)
+        if pyramid is None:
+            return False
+        self.image_label.set_pyramid(pyramid)
+        return True
 
     def apply_edits(self):
         """Apply the selected edits to the current image."""
@@ -186,73 +326,165 @@ class ImageEditorTab(QWidget):
             )
             return
 
+        # The current version must be on disk before it can be uploaded
+        if not self.wait_for_save(self.current_version):
+            return
+
         # Get current image path
         current_image_path = self.file_manager.get_current_version_path(self.current_version)
 
-        # Show progress dialog
-        progress = QProgressDialog(
-            "Generating edited image...",
-            None,
-            0,
-            0,
-            self
-        )
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setWindowTitle("Processing")
-        progress.show()
-
-        # Disable apply button during processing
-        self.apply_button.setEnabled(False)
-
-        # Create and start worker thread
-        self.worker = ImageEditWorker(
-            self.gemini_client,
-            current_image_path,
-            prompt,
-            aspect_ratio=self.aspect_ratio
-        )
-        self.worker.finished.connect(
-            lambda img, txt: self.on_edit_complete(img, txt, progress)
-        )
-        self.worker.error.connect(
-            lambda err: self.on_edit_error(err, progress)
+        # A double-click or repeated Apply would only save the same result twice
+        duplicate = self.find_active_job(current_image_path, prompt)
+        if duplicate is not None:
+            self.job_list.setCurrentItem(self.job_items[duplicate])
+            return
+
+        job = self.scheduler.submit(
+            self, current_image_path, prompt, aspect_ratio=self.aspect_ratio
         )
-        self.worker.start()
+        job.state_changed.connect(lambda state, job=job: self.update_job_item(job))
+        job.first_byte.connect(lambda seconds, job=job: self.update_job_item(job))
+        job.text_received.connect(lambda text, job=job: self.update_job_item(job))
+        job.finished.connect(lambda img, txt, job=job: self.on_edit_complete(job, img, txt))
+        job.error.connect(lambda err, job=job: self.on_edit_error(job, err))
+
+        item = QListWidgetItem()
+        item.setData(Qt.UserRole, job)
+        self.job_list.addItem(item)
+        self.job_items[job] = item
+        self.update_job_item(job)
+
+    def find_active_job(self, image_path: Path, prompt: str) -> Optional[EditJob]:
+        """Get this tab's queued or running edit of an image with a prompt, if any."""
+        for job in self.job_items:
+            if job.state in EditJob.FINAL_STATES:
+                continue
+            if (job.image_path, job.prompt, job.aspect_ratio) == (
+                image_path, prompt, self.aspect_ratio
+            ):
+                return job
+        return None
+
+    def update_job_item(self, job: EditJob):
+        """Show a job's state, and any streamed text, in the queue list."""
+        item = self.job_items.get(job)
+        if item is None:
+            return
 
-    def on_edit_complete(self, result_image: Image.Image, text_response: str, progress):
+        prompt = job.prompt if len(job.prompt) <= 60 else job.prompt[:57] + "..."
+        text = f"[{job.state}] {prompt}"
+        if job.state == EditJob.RUNNING and job.first_byte_after is not None:
+            text += f" (responding after {job.first_byte_after:.1f}s)"
+        if job.streamed_text.strip():
+            text += f"\n{job.streamed_text.strip()}"
+        item.setText(text)
+
+        if job.state in EditJob.FINAL_STATES:
+            self.prune_finished_jobs()
+
+    def prune_finished_jobs(self):
+        """Keep only the most recent finished jobs in the queue list."""
+        finished = [job for job in self.job_items if job.state in EditJob.FINAL_STATES]
+        for job in finished[:-self.MAX_FINISHED_JOBS]:
+            item = self.job_items.pop(job)
+            self.job_list.takeItem(self.job_list.row(item))
+
+    def cancel_selected_job(self):
+        """Cancel the queued or running edit selected in the queue list."""
+        item = self.job_list.currentItem()
+        if item is not None:
+            item.data(Qt.UserRole).cancel()
+
+    def cancel_all_jobs(self):
+        """Cancel every edit of this tab, e.g. before it closes."""
+        self.scheduler.cancel_owner(self)
+
+    def on_edit_complete(self, job: EditJob, result_image: EncodedImage, text_response: str):
         """Handle successful image edit."""
-        progress.close()
-        self.apply_button.setEnabled(True)
+        # New versions always go after the latest, whichever one was edited. The
+        # number is reserved on disk, so other tabs or a batch run can't take it.
+        try:
+            version_number, _ = self.file_manager.reserve_version(result_image)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to save edited image: {str(e)}")
+            return
+        self.latest_version = version_number
+        self.current_version = version_number
+
+        if self.hibernated:
+            # Only record it; rehydrate decodes the current version from disk
+            self.version_model.add_version(self.current_version)
+        else:
+            # Display the new version from memory while its bytes are written as-is
+            pixmap = self.encoded_to_qpixmap(result_image)
+            self.display_image(pixmap, self.current_version)
+            self.version_model.add_version(self.current_version, pixmap)
+        self.version_strip.select_version(self.current_version)
+
+        # Update version label
+        self.version_label.setText(f"Version: {self.current_version}")
+
+        # Enable discard button
+        self.discard_button.setEnabled(True)
+
+        # Save the new version in the background
+        future = self.version_writer.submit(
+            self.file_manager.save_version,
+            result_image,
+            version_number,
+            prompt=job.prompt,
+            model=self.gemini_client.MODEL_NAME
+        )
+        self.pending_saves[version_number] = future
+        future.add_done_callback(lambda f: self._save_finished.emit(version_number, f))
+
+    def on_save_finished(self, version_number: int, future):
+        """Handle completion of a background save."""
+        if self.pending_saves.get(version_number) is future:
+            del self.pending_saves[version_number]
 
         try:
-            # Save the new version
-            self.current_version += 1
-            version_path = self.file_manager.save_version(result_image, self.current_version)
+            version_path = future.result()
+        except Exception as e:
+            self.version_save_failed.emit(version_number, str(e))
+            QMessageBox.critical(
+                self,
+                "Error",
+                f"Failed to save edited image: {str(e)}"
+            )
+            return
 
-            # Display the new version
-            pixmap = self.pil_to_qpixmap(result_image)
-            self.display_image(pixmap)
+        # Versions recorded without a pixmap can get their thumbnail now
+        self.version_model.refresh(version_number)
+        self.version_saved.emit(version_number, str(version_path))
 
-            # Update version label
-            self.version_label.setText(f"Version: {self.current_version}")
+    def wait_for_save(self, version_number: int) -> bool:
+        """
+        Block until a pending background save of a version has finished.
 
-            # Enable discard button
-            self.discard_button.setEnabled(True)
+        Args:
+            version_number: Version to wait for
 
-            # TODO: Update thumbnail display
+        Returns:
+            True if the version is on disk (or had no pending save)
+        """
+        future = self.pending_saves.get(version_number)
+        if future is None:
+            return True
 
+        try:
+            future.result()
+            return True
         except Exception as e:
             QMessageBox.critical(
                 self,
                 "Error",
-                f"Failed to save edited image: {str(e)}"
+                f"Version {version_number} could not be saved: {str(e)}"
             )
+            return False
 
-    def on_edit_error(self, error_message: str, progress):
+    def on_edit_error(self, job: EditJob, error_message: str):
         """Handle image edit error."""
-        progress.close()
-        self.apply_button.setEnabled(True)
-
         QMessageBox.critical(
             self,
             "Edit Failed",
@@ -260,26 +492,26 @@ class ImageEditorTab(QWidget):
         )
 
     def discard_version(self):
-        """Discard the current version and load the previous one."""
-        if self.current_version == 0:
+        """Discard the latest version and show the one before it if it was on screen."""
+        if self.latest_version == 0:
             return
 
         try:
-            # Delete current version
-            self.file_manager.delete_version(self.current_version)
-
-            # Go back to previous version
-            self.current_version -= 1
-
-            # Load previous version
-            if self.current_version == 0:
-                self.load_original_image()
-                self.discard_button.setEnabled(False)
-            else:
-                version_path = self.file_manager.get_current_version_path(self.current_version)
-                pixmap = QPixmap(str(version_path))
-                self.display_image(pixmap)
-                self.version_label.setText(f"Version: {self.current_version}")
+            # Let pending writes land so the manifest is complete before deleting
+            for version_number in sorted(self.pending_saves):
+                self.wait_for_save(version_number)
+
+            # Delete latest version
+            discarded = self.latest_version
+            self.file_manager.delete_version(discarded)
+            self.version_model.remove_version(discarded)
+            self.pyramids.pop(discarded)
+            self.latest_version = self.file_manager.get_latest_version_number()
+            self.discard_button.setEnabled(self.latest_version > 0)
+
+            # Go back to the previous version if the discarded one was displayed
+            if self.current_version == discarded:
+                self.show_version(self.latest_version)
 
         except Exception as e:
             QMessageBox.critical(
@@ -288,20 +520,12 @@ class ImageEditorTab(QWidget):
                 f"Failed to discard version: {str(e)}"
             )
 
+    @staticmethod
+    def encoded_to_qpixmap(image: EncodedImage) -> QPixmap:
+        """Decode encoded image bytes straight into a QPixmap."""
+        return qt_images.encoded_to_qpixmap(image)
+
     @staticmethod
     def pil_to_qpixmap(pil_image: Image.Image) -> QPixmap:
         """Convert PIL Image to QPixmap."""
-        # Convert PIL image to bytes
-        pil_image = pil_image.convert("RGBA")
-        data = pil_image.tobytes("raw", "RGBA")
-
-        # Create QImage
-        qimage = QImage(
-            data,
-            pil_image.width,
-            pil_image.height,
-            QImage.Format_RGBA8888
-        )
-
-        # Convert to QPixmap
-        return QPixmap.fromImage(qimage)
+        return qt_images.pil_to_qpixmap(pil_image)
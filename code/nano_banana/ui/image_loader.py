@@ -0,0 +1,112 @@
+"""Off-thread, optionally downscaled decoding of image files."""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PySide6.QtCore import QObject, QSize, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QImageIOHandler, QImageReader
+from PIL import Image, ImageOps
+
+from .background_tasks import TaskRunner
+from .qt_images import pil_to_qimage
+
+
+def decode_image(path: Path, max_size: Optional[QSize] = None) -> Tuple[QImage, QSize]:
+    """
+    Decode an image file, applying its EXIF orientation.
+
+    With ``max_size`` the image is decoded at the largest size that fits,
+    which Qt's JPEG reader does directly from the DCT coefficients. Formats
+    Qt can't read are decoded by PIL, using ``draft()`` for JPEG.
+
+    Args:
+        path: Image file
+        max_size: Bounding box for the decoded image, or None for full resolution
+
+    Returns:
+        Tuple of (decoded image, full-resolution size after orientation)
+
+    Raises:
+        OSError: If the file can't be decoded
+    """
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+
+    stored_size = reader.size()
+    if stored_size.isValid():
+        # Orientations with a quarter turn swap width and height
+        rotated = bool(reader.transformation() & QImageIOHandler.TransformationRotate90)
+        full_size = stored_size.transposed() if rotated else stored_size
+        too_large = max_size is not None and (
+            full_size.width() > max_size.width() or full_size.height() > max_size.height()
+        )
+        if too_large:
+            # Scaling happens before the orientation is applied, in stored coordinates
+            bounds = max_size.transposed() if rotated else max_size
+            reader.setScaledSize(stored_size.scaled(bounds, Qt.KeepAspectRatio))
+
+        image = reader.read()
+        if not image.isNull():
+            return image, full_size
+
+    return _decode_with_pil(path, max_size)
+
+
+def _decode_with_pil(path: Path, max_size: Optional[QSize]) -> Tuple[QImage, QSize]:
+    """Fallback decoder for formats without a Qt image plugin."""
+    with Image.open(path) as image:
+        if max_size is not None:
+            image.draft("RGB", (max_size.width(), max_size.height()))
+        image = ImageOps.exif_transpose(image)
+        full_size = QSize(*image.size)
+        if max_size is not None:
+            image.thumbnail((max_size.width(), max_size.height()), Image.Resampling.LANCZOS)
+        # Detach from the PIL buffer so the QImage can cross threads
+        return pil_to_qimage(image).copy(), full_size
+
+
+class ImageLoader(QObject):
+    """
+    Decodes image files on a thread pool and reports back on the GUI thread.
+
+    Every ``request`` returns an id that is passed back with ``decoded`` or
+    ``failed``, so callers can drop results they no longer need.
+    """
+
+    decoded = Signal(int, QImage, QSize)  # (request id, image, full-resolution size)
+    failed = Signal(int, str)  # (request id, error message)
+
+    def __init__(self, thread_pool: Optional[QThreadPool] = None, parent=None):
+        """
+        Initialize the loader.
+
+        Args:
+            thread_pool: Pool for decode jobs; defaults to the global pool
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._runner = TaskRunner(thread_pool, self)
+        self._runner.finished.connect(self._on_finished)
+        self._runner.failed.connect(self.failed)
+
+    @property
+    def thread_pool(self) -> QThreadPool:
+        """Pool the decode jobs run on."""
+        return self._runner.thread_pool
+
+    def request(self, path: Path, max_size: Optional[QSize] = None) -> int:
+        """
+        Start decoding a file.
+
+        Args:
+            path: Image file
+            max_size: Bounding box for a downscaled decode, or None for full resolution
+
+        Returns:
+            Request id
+        """
+        return self._runner.submit(decode_image, Path(path), max_size)
+
+    def _on_finished(self, request_id: int, result: Tuple[QImage, QSize]):
+        image, full_size = result
+        self.decoded.emit(request_id, image, full_size)
@@ -0,0 +1,280 @@
+"""Fit-to-view image display backed by a multi-resolution pixmap pyramid."""
+
+from collections import OrderedDict
+from typing import List, Optional
+
+from PySide6.QtWidgets import QLabel, QSizePolicy
+from PySide6.QtCore import Qt, QSize, QTimer, Signal
+from PySide6.QtGui import QPixmap, QResizeEvent, QShowEvent
+
+from ..utils.memory import available_memory
+
+
+class PixmapPyramid:
+    """
+    A pixmap and successively halved copies of it (a mipmap pyramid).
+
+    Levels are built on demand, each from the one above, so a level costs
+    a quarter of the work of its parent. Scaling to a display size starts
+    from the smallest level that is still at least that large, which keeps
+    both fast and smooth rescales cheap for big images.
+    """
+
+    MIN_EDGE = 256  # no levels are built below this size
+
+    def __init__(self, pixmap: QPixmap, source_size: Optional[QSize] = None):
+        """
+        Initialize the pyramid.
+
+        Args:
+            pixmap: Largest available image (level 0)
+            source_size: Full resolution of the image if ``pixmap`` is a downscaled preview
+        """
+        self.levels: List[QPixmap] = [pixmap]
+        self.source_size = source_size or pixmap.size()
+
+    @property
+    def full(self) -> QPixmap:
+        """The largest available pixmap."""
+        return self.levels[0]
+
+    @property
+    def is_preview(self) -> bool:
+        """Whether level 0 is smaller than the image's full resolution."""
+        full = self.full
+        return full.width() < self.source_size.width() or full.height() < self.source_size.height()
+
+    def fitted_size(self, target: QSize) -> QSize:
+        """Size of the image scaled to fit ``target`` with its aspect ratio."""
+        return self.full.size().scaled(target, Qt.KeepAspectRatio)
+
+    def level_for(self, size: QSize) -> QPixmap:
+        """
+        Get the smallest level at least as large as ``size``.
+
+        Args:
+            size: Size the image will be drawn at
+
+        Returns:
+            Pyramid level to scale from
+        """
+        index = 0
+        while True:
+            if index + 1 == len(self.levels) and not self._build_next():
+                break
+            below = self.levels[index + 1]
+            if below.width() < size.width() or below.height() < size.height():
+                break
+            index += 1
+        return self.levels[index]
+
+    def _build_next(self) -> bool:
+        """Add the next smaller level; return False if the pyramid is complete."""
+        last = self.levels[-1]
+        width, height = last.width() // 2, last.height() // 2
+        if max(width, height) < self.MIN_EDGE or min(width, height) < 1:
+            return False
+        self.levels.append(
+            last.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        )
+        return True
+
+    def scaled(self, target: QSize, smooth: bool) -> QPixmap:
+        """
+        Scale the image to fit ``target``.
+
+        Args:
+            target: Available size
+            smooth: Use bilinear filtering instead of nearest-neighbour
+
+        Returns:
+            Scaled pixmap
+        """
+        size = self.fitted_size(target)
+        level = self.level_for(size)
+        if level.size() == size:
+            return level
+        transformation = Qt.SmoothTransformation if smooth else Qt.FastTransformation
+        return level.scaled(size, Qt.IgnoreAspectRatio, transformation)
+
+    def cost(self) -> int:
+        """Approximate memory held by the built levels, in bytes."""
+        return sum(
+            level.width() * level.height() * max(level.depth() // 8, 1) for level in self.levels
+        )
+
+
+class PyramidCache:
+    """
+    LRU of decoded versions (as pyramids), bounded by a byte budget.
+
+    Sizes are re-measured on every insert, since pyramids grow as levels
+    are built. When the system reports less than ``LOW_MEMORY_BYTES``
+    available, the cache shrinks to a quarter of its budget.
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    LOW_MEMORY_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Budget for all cached pyramids together
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, PixmapPyramid]" = OrderedDict()  # least recent first
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, version_number: int) -> bool:
+        return version_number in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        """Memory held by the cached pyramids."""
+        return sum(pyramid.cost() for pyramid in self._entries.values())
+
+    def holds(self, pyramid: PixmapPyramid) -> bool:
+        """Check whether a pyramid is one of the cached entries."""
+        return any(entry is pyramid for entry in self._entries.values())
+
+    def get(self, version_number: int) -> Optional[PixmapPyramid]:
+        """Get a version's pyramid and mark it most recently used."""
+        pyramid = self._entries.get(version_number)
+        if pyramid is not None:
+            self._entries.move_to_end(version_number)
+        return pyramid
+
+    def put(self, version_number: int, pyramid: PixmapPyramid):
+        """Add or replace a version's pyramid, evicting old ones to stay in budget."""
+        self._entries[version_number] = pyramid
+        self._entries.move_to_end(version_number)
+
+        available = available_memory()
+        if available is not None and available < self.LOW_MEMORY_BYTES:
+            self.shrink(self.max_bytes // 4)
+        else:
+            self.shrink(self.max_bytes)
+
+    def pop(self, version_number: int):
+        """Drop a version, e.g. after it was discarded."""
+        self._entries.pop(version_number, None)
+
+    def shrink(self, max_bytes: int = 0) -> int:
+        """
+        Evict least recently used pyramids until at most ``max_bytes`` remain.
+
+        The most recently used entry is kept if it alone exceeds the limit,
+        unless ``max_bytes`` is 0.
+
+        Args:
+            max_bytes: Target size; 0 empties the cache
+
+        Returns:
+            Bytes released
+        """
+        sizes = OrderedDict((number, pyramid.cost()) for number, pyramid in self._entries.items())
+        total = sum(sizes.values())
+        released = 0
+        for number, size in sizes.items():
+            if total <= max_bytes or (max_bytes and len(self._entries) == 1):
+                break
+            del self._entries[number]
+            total -= size
+            released += size
+        return released
+
+
+class ImageViewer(QLabel):
+    """
+    Label showing an image scaled to fit, redrawn as it resizes.
+
+    Resizes and image switches draw a fast (nearest-neighbour) rescale from
+    the nearest pyramid level straight away. The smooth rescale follows once
+    the view has been idle for ``IDLE_DELAY_MS``.
+
+    When the image is a downscaled preview and the view grows beyond it,
+    ``resolution_needed`` asks the owner for a larger decode.
+    """
+
+    IDLE_DELAY_MS = 150
+
+    resolution_needed = Signal(QSize)  # display size the preview can't cover
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignCenter)
+        # Size follows the viewport, never the pixmap, so the view can shrink
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.pyramid: Optional[PixmapPyramid] = None
+
+        self._smooth_timer = QTimer(self)
+        self._smooth_timer.setSingleShot(True)
+        self._smooth_timer.setInterval(self.IDLE_DELAY_MS)
+        self._smooth_timer.timeout.connect(lambda: self._rescale(smooth=True))
+
+    def set_pyramid(self, pyramid: Optional[PixmapPyramid]):
+        """Show the image of a pyramid (or nothing for None)."""
+        self.pyramid = pyramid
+        if pyramid is None or pyramid.full.isNull():
+            self._smooth_timer.stop()
+            self.clear()
+            return
+        self._rescale(smooth=False)
+        self._smooth_timer.start()
+
+    def set_image(self, pixmap: QPixmap, source_size: Optional[QSize] = None) -> PixmapPyramid:
+        """
+        Show a pixmap.
+
+        Args:
+            pixmap: Image to show
+            source_size: Full resolution if ``pixmap`` is a downscaled preview
+
+        Returns:
+            The pyramid built for it, for reuse when switching back
+        """
+        pyramid = PixmapPyramid(pixmap, source_size)
+        self.set_pyramid(pyramid)
+        return pyramid
+
+    def release(self, edge: int = 256):
+        """
+        Replace the image with a small placeholder to free memory.
+
+        The placeholder is shown (enlarged) until a new image is set.
+
+        Args:
+            edge: Longest edge of the placeholder in pixels
+        """
+        self._smooth_timer.stop()
+        if self.pyramid is not None and not self.pyramid.full.isNull():
+            placeholder = self.pyramid.scaled(QSize(edge, edge), smooth=True)
+            self.pyramid = PixmapPyramid(placeholder, self.pyramid.source_size)
+        self.clear()
+
+    def _rescale(self, smooth: bool):
+        if self.pyramid is None or self.width() < 1 or self.height() < 1:
+            return
+        self.setPixmap(self.pyramid.scaled(self.size(), smooth))
+
+        if self.pyramid.is_preview:
+            wanted = self.pyramid.source_size.scaled(self.size(), Qt.KeepAspectRatio)
+            full = self.pyramid.full
+            if wanted.width() > full.width() or wanted.height() > full.height():
+                self.resolution_needed.emit(wanted)
+
+    def showEvent(self, event: QShowEvent):
+        super().showEvent(event)
+        if self.pyramid is not None and self.pixmap().isNull():
+            self._rescale(smooth=False)
+            self._smooth_timer.start()
+
+    def resizeEvent(self, event: QResizeEvent):
+        super().resizeEvent(event)
+        if self.pyramid is not None:
+            self._rescale(smooth=False)
+            self._smooth_timer.start()
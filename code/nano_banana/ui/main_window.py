@@ -2,25 +2,64 @@
 
 from PySide6.QtWidgets import (
     QMainWindow, QTabWidget, QMenuBar, QMenu, QFileDialog,
-    QMessageBox, QWidget, QVBoxLayout, QLabel
+    QMessageBox, QWidget, QVBoxLayout, QLabel, QInputDialog
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QAction, QDragEnterEvent, QDropEvent
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QAction, QCloseEvent, QDragEnterEvent, QDropEvent
 from pathlib import Path
+import threading
 
 from .api_key_dialog import ApiKeyDialog
+from .edit_scheduler import EditScheduler
 from .image_editor_tab import ImageEditorTab
+from .pending_tab import PendingImageTab, TabPreparer
 from ..core.gemini_client import GeminiClient
+from ..core.response_cache import ResponseCache
+from ..utils.background_writer import BackgroundWriter
+from ..utils.file_manager import FileManager, StorageOptions
+from ..utils.thumbnail_cache import ThumbnailCache
 
 
 class MainWindow(QMainWindow):
-    """Main application window with tabbed image editor interface."""
+    """
+    Main application window with tabbed image editor interface.
 
-    def __init__(self):
+    Decoded image data of all tabs is kept within ``image_memory_budget``:
+    when it is exceeded, the least recently selected background tabs are
+    hibernated, and they decode their image again when selected.
+
+    Opened images first get a ``PendingImageTab`` while their version
+    directory is set up in the background; the editor itself is only built
+    when the tab is selected, so dropping many files at once stays cheap.
+    """
+
+    DEFAULT_IMAGE_MEMORY_BUDGET = 1024 * 1024 * 1024
+    IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+
+    api_key_checked = Signal(bool)  # whether a key was found, once the startup lookup ends
+    _api_key_loaded = Signal(bool)  # emitted from the lookup thread
+
+    def __init__(self, image_memory_budget: int = DEFAULT_IMAGE_MEMORY_BUDGET):
         super().__init__()
-        self.gemini_client = GeminiClient()
+        self.image_memory_budget = image_memory_budget
+        self.tab_history = []  # editor tabs, least recently selected first
+        self._memory_check_timer = QTimer(self)
+        self._memory_check_timer.setSingleShot(True)
+        self._memory_check_timer.timeout.connect(self.enforce_memory_budget)
+        self.gemini_client = GeminiClient(cache=ResponseCache())
+        self.version_writer = BackgroundWriter(name="version-writer")
+        self.thumbnail_cache = ThumbnailCache()
+        self.edit_scheduler = EditScheduler(self.gemini_client, parent=self)
+        self.tab_preparer = TabPreparer(parent=self)
+        self.tab_preparer.finished.connect(self.on_tab_prepared)
+        self.tab_preparer.failed.connect(self.on_tab_prepare_failed)
+        self.pending_tabs = {}  # prepare request id -> PendingImageTab
         self.default_aspect_ratio = "preserve"  # Default aspect ratio
+        self.storage_options = StorageOptions()  # As returned by the model
         self.setup_ui()
+
+        # The keyring lookup and SDK import run while the window paints
+        self._api_key_loaded.connect(self.on_api_key_loaded, Qt.QueuedConnection)
         self.check_api_key()
 
         # Enable drag and drop
@@ -36,9 +75,15 @@ class MainWindow(QMainWindow):
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.setMovable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        self.tab_widget.currentChanged.connect(self.on_current_tab_changed)
 
         self.setCentralWidget(self.tab_widget)
 
+        # Edit queue status, shared by all tabs
+        self.queue_status_label = QLabel()
+        self.statusBar().addPermanentWidget(self.queue_status_label)
+        self.edit_scheduler.counts_changed.connect(self.on_queue_counts_changed)
+
         # Create menu bar
         self.create_menu_bar()
 
@@ -72,6 +117,10 @@ class MainWindow(QMainWindow):
         api_key_action.triggered.connect(self.configure_api_key)
         settings_menu.addAction(api_key_action)
 
+        memory_action = QAction("Image &Memory Budget...", self)
+        memory_action.triggered.connect(self.configure_memory_budget)
+        settings_menu.addAction(memory_action)
+
         # Help menu
         help_menu = menubar.addMenu("&Help")
 
@@ -121,6 +170,18 @@ class MainWindow(QMainWindow):
         self.aspect_ratio_combo.currentIndexChanged.connect(self.on_aspect_ratio_changed)
 
         settings_layout.addRow("Output Aspect Ratio:", self.aspect_ratio_combo)
+
+        self.storage_format_combo = QComboBox()
+        self.storage_format_combo.addItem("As Returned by Model", StorageOptions())
+        self.storage_format_combo.addItem(
+            "PNG (Max Compression)", StorageOptions("PNG", compress_level=9)
+        )
+        self.storage_format_combo.addItem("WebP Lossless", StorageOptions("WEBP", lossless=True))
+        self.storage_format_combo.addItem("WebP (Quality 90)", StorageOptions("WEBP", quality=90))
+        self.storage_format_combo.addItem("JPEG (Quality 90)", StorageOptions("JPEG", quality=90))
+        self.storage_format_combo.currentIndexChanged.connect(self.on_storage_format_changed)
+
+        settings_layout.addRow("Version Storage:", self.storage_format_combo)
         settings_group.setLayout(settings_layout)
         settings_group.setMaximumWidth(400)
         layout.addWidget(settings_group, alignment=Qt.AlignCenter)
@@ -138,8 +199,17 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(welcome_widget, "Welcome")
 
     def check_api_key(self):
-        """Check if API key is configured on startup."""
-        if not self.gemini_client.has_api_key():
+        """Start looking up the API key in the background."""
+        threading.Thread(
+            target=lambda: self._api_key_loaded.emit(self.gemini_client.load_api_key()),
+            name="api-key-lookup",
+            daemon=True
+        ).start()
+
+    def on_api_key_loaded(self, found: bool):
+        """Offer to configure an API key if none was found on startup."""
+        self.api_key_checked.emit(found)
+        if not found:
             reply = QMessageBox.question(
                 self,
                 "API Key Required",
@@ -165,34 +235,90 @@ class MainWindow(QMainWindow):
         )
 
         if file_path:
-            self.create_image_tab(Path(file_path))
+            self.open_images([Path(file_path)])
 
-    def create_image_tab(self, image_path: Path):
+    def open_images(self, image_paths):
         """
-        Create a new tab for editing an image.
+        Open images in new tabs without blocking the window.
+
+        Each image gets a placeholder tab right away; its version directory
+        is set up on a background pool. The first new tab is selected.
 
         Args:
-            image_path: Path to the image file
+            image_paths: Image files to open
         """
-        try:
-            # Create new editor tab with current aspect ratio setting
-            editor_tab = ImageEditorTab(
-                image_path,
-                self.gemini_client,
-                self,
-                aspect_ratio=self.default_aspect_ratio
-            )
-
-            # Add tab with filename as title
-            tab_index = self.tab_widget.addTab(editor_tab, image_path.name)
-            self.tab_widget.setCurrentIndex(tab_index)
+        first_index = None
+        for image_path in dict.fromkeys(Path(path) for path in image_paths):
+            placeholder = PendingImageTab(image_path)
+            tab_index = self.tab_widget.addTab(placeholder, image_path.name)
+            self.tab_widget.setTabToolTip(tab_index, str(image_path))
+            request_id = self.tab_preparer.request(image_path, self.storage_options)
+            self.pending_tabs[request_id] = placeholder
+            if first_index is None:
+                first_index = tab_index
+
+        if first_index is not None:
+            self.tab_widget.setCurrentIndex(first_index)
+
+    def build_editor_tab(
+        self,
+        image_path: Path,
+        file_manager: FileManager = None
+    ) -> ImageEditorTab:
+        """Create an editor tab with the window's shared services and current settings."""
+        editor_tab = ImageEditorTab(
+            image_path,
+            self.gemini_client,
+            self,
+            aspect_ratio=self.default_aspect_ratio,
+            version_writer=self.version_writer,
+            storage_options=self.storage_options,
+            thumbnail_cache=self.thumbnail_cache,
+            scheduler=self.edit_scheduler,
+            file_manager=file_manager
+        )
+        editor_tab.memory_changed.connect(self.schedule_memory_check)
+        return editor_tab
+
+    def on_tab_prepared(self, request_id: int, file_manager: FileManager):
+        """Mark a placeholder ready, and open its editor if it is on screen."""
+        placeholder = self.pending_tabs.pop(request_id, None)
+        if placeholder is None:
+            return  # Closed while being prepared
+
+        placeholder.set_ready(file_manager)
+        if self.tab_widget.currentWidget() is placeholder:
+            self.materialize_tab(placeholder)
+
+    def on_tab_prepare_failed(self, request_id: int, message: str):
+        """Show a setup error in the placeholder."""
+        placeholder = self.pending_tabs.pop(request_id, None)
+        if placeholder is not None:
+            placeholder.set_failed(message)
+
+    def materialize_tab(self, placeholder: PendingImageTab):
+        """Replace a ready placeholder with a real editor tab at the same position."""
+        index = self.tab_widget.indexOf(placeholder)
+        if index < 0:
+            return
 
+        try:
+            editor_tab = self.build_editor_tab(placeholder.image_path, placeholder.file_manager)
         except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error Opening Image",
-                f"Failed to open image: {str(e)}"
-            )
+            placeholder.set_failed(str(e))
+            return
+
+        # Swap without intermediate currentChanged signals, then announce the result once
+        self.tab_widget.blockSignals(True)
+        try:
+            self.tab_widget.insertTab(index, editor_tab, placeholder.image_path.name)
+            self.tab_widget.setTabToolTip(index, str(placeholder.image_path))
+            self.tab_widget.removeTab(index + 1)
+            self.tab_widget.setCurrentIndex(index)
+        finally:
+            self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+        self.on_current_tab_changed(index)
 
     def close_tab(self, index: int):
         """
@@ -203,10 +329,80 @@ class MainWindow(QMainWindow):
         """
         # TODO: Ask to save if there are unsaved changes
         widget = self.tab_widget.widget(index)
+        if widget in self.tab_history:
+            self.tab_history.remove(widget)
+        if isinstance(widget, ImageEditorTab):
+            widget.cancel_all_jobs()
+        if isinstance(widget, PendingImageTab):
+            self.pending_tabs = {
+                request_id: placeholder for request_id, placeholder in self.pending_tabs.items()
+                if placeholder is not widget
+            }
         if widget:
             widget.deleteLater()
         self.tab_widget.removeTab(index)
 
+    def configure_memory_budget(self):
+        """Ask for the image memory budget and apply it."""
+        budget_mib, ok = QInputDialog.getInt(
+            self,
+            "Image Memory Budget",
+            "Memory for decoded images across all tabs (MiB):",
+            self.image_memory_budget // (1024 * 1024),
+            64,
+            65536,
+            64
+        )
+        if ok:
+            self.image_memory_budget = budget_mib * 1024 * 1024
+            self.enforce_memory_budget()
+
+    def on_current_tab_changed(self, index: int):
+        """Track tab recency, bring a hibernated tab back and open prepared placeholders."""
+        widget = self.tab_widget.widget(index)
+        if isinstance(widget, PendingImageTab) and widget.is_ready:
+            self.materialize_tab(widget)
+            return
+        if not isinstance(widget, ImageEditorTab):
+            return
+
+        if widget in self.tab_history:
+            self.tab_history.remove(widget)
+        self.tab_history.append(widget)
+        self.edit_scheduler.set_foreground(widget)
+        widget.rehydrate()
+        self.schedule_memory_check()
+
+    def on_queue_counts_changed(self, running: int, queued: int):
+        """Show how many edits are running and waiting across all tabs."""
+        if running or queued:
+            self.queue_status_label.setText(f"Edits: {running} running, {queued} queued")
+        else:
+            self.queue_status_label.setText("")
+
+    def schedule_memory_check(self):
+        """Check the memory budget once control returns to the event loop."""
+        self._memory_check_timer.start(0)
+
+    def enforce_memory_budget(self):
+        """Hibernate background tabs, least recently selected first, until within budget."""
+        current = self.tab_widget.currentWidget()
+        usage = {tab: tab.memory_usage() for tab in self.tab_history}
+        total = sum(usage.values())
+
+        for tab in list(self.tab_history):
+            if total <= self.image_memory_budget:
+                return
+            if tab is current or tab.hibernated:
+                continue
+            tab.hibernate()
+            total -= usage[tab]
+
+        # Still over: trim the visible tab's cache, keeping what is on screen
+        if total > self.image_memory_budget and current in usage:
+            others = total - usage[current]
+            current.release_memory(max(self.image_memory_budget - others, 0))
+
     def show_about(self):
         """Show the about dialog."""
         QMessageBox.about(
@@ -223,6 +419,11 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'aspect_ratio_combo'):
             self.default_aspect_ratio = self.aspect_ratio_combo.itemData(index)
 
+    def on_storage_format_changed(self, index):
+        """Handle storage format selection change (applies to newly opened images)."""
+        if hasattr(self, 'storage_format_combo'):
+            self.storage_options = self.storage_format_combo.itemData(index)
+
     def dragEnterEvent(self, event: QDragEnterEvent):
         """Handle drag enter event."""
         if event.mimeData().hasUrls():
@@ -230,15 +431,25 @@ class MainWindow(QMainWindow):
             for url in event.mimeData().urls():
                 if url.isLocalFile():
                     file_path = Path(url.toLocalFile())
-                    if file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp']:
+                    if file_path.suffix.lower() in self.IMAGE_SUFFIXES:
                         event.acceptProposedAction()
                         return
 
     def dropEvent(self, event: QDropEvent):
         """Handle drop event."""
+        image_paths = []
         for url in event.mimeData().urls():
             if url.isLocalFile():
                 file_path = Path(url.toLocalFile())
-                if file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp']:
-                    self.create_image_tab(file_path)
+                if file_path.suffix.lower() in self.IMAGE_SUFFIXES:
+                    image_paths.append(file_path)
+        self.open_images(image_paths)
         event.acceptProposedAction()
+
+    def closeEvent(self, event: QCloseEvent):
+        """Finish pending version saves and image setups before the window closes."""
+        self.version_writer.shutdown(wait=True)
+        # Drop setups that haven't started; only running ones are waited for
+        self.tab_preparer.thread_pool.clear()
+        self.tab_preparer.thread_pool.waitForDone()
+        super().closeEvent(event)
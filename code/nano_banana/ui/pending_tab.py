@@ -0,0 +1,85 @@
+"""Placeholder tabs for images whose version directory is still being set up."""
+
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PySide6.QtCore import Qt, QThreadPool
+
+from .background_tasks import TaskRunner
+from ..utils.file_manager import FileManager, StorageOptions
+
+
+class TabPreparer(TaskRunner):
+    """
+    Sets up file managers for newly opened images off the GUI thread.
+
+    Uses a small pool of its own: the work is mostly disk I/O, and a large
+    drop shouldn't hold up the decode and thumbnail jobs of open tabs.
+    ``finished`` delivers the ``FileManager``.
+    """
+
+    DEFAULT_MAX_THREADS = 2
+
+    def __init__(self, max_threads: int = DEFAULT_MAX_THREADS, parent=None):
+        """
+        Initialize the preparer.
+
+        Args:
+            max_threads: Number of images set up concurrently
+            parent: Parent QObject
+        """
+        thread_pool = QThreadPool()
+        thread_pool.setMaxThreadCount(max_threads)
+        super().__init__(thread_pool, parent)
+        thread_pool.setParent(self)
+
+    def request(self, path: Path, storage_options: Optional[StorageOptions] = None) -> int:
+        """
+        Start setting up an image.
+
+        Args:
+            path: Image file
+            storage_options: How the image's new versions will be encoded
+
+        Returns:
+            Request id
+        """
+        return self.submit(FileManager, Path(path), storage_options)
+
+
+class PendingImageTab(QWidget):
+    """
+    Lightweight stand-in for an ``ImageEditorTab``.
+
+    Holds no images or editor widgets. The main window replaces it with a
+    real editor tab once it is selected and its file manager is ready.
+    """
+
+    def __init__(self, image_path: Path, parent=None):
+        super().__init__(parent)
+        self.image_path = Path(image_path)
+        self.file_manager: Optional[FileManager] = None
+        self.error: Optional[str] = None
+
+        layout = QVBoxLayout()
+        self.status_label = QLabel(f"Preparing {self.image_path.name}...")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the editor tab can be created."""
+        return self.file_manager is not None
+
+    def set_ready(self, file_manager: FileManager):
+        """Record the prepared file manager."""
+        self.file_manager = file_manager
+        self.status_label.setText(f"{self.image_path.name} is ready.")
+
+    def set_failed(self, message: str):
+        """Show why the image couldn't be opened."""
+        self.error = message
+        self.status_label.setText(f"Failed to open {self.image_path.name}:\n{message}")
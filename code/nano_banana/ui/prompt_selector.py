@@ -14,7 +14,7 @@ class PromptSelector(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.prompt_manager = PromptManager()
+        self.prompt_manager = PromptManager.shared()
         self.setup_ui()
 
     def setup_ui(self):
@@ -100,16 +100,4 @@ class PromptSelector(QWidget):
         Returns:
             Combined prompt string
         """
-        selected_templates = self.get_selected_templates()
-
-        if custom_text and selected_templates:
-            # Custom + templates
-            return self.prompt_manager.create_custom_prompt(custom_text, selected_templates)
-        elif custom_text:
-            # Custom only
-            return custom_text
-        elif selected_templates:
-            # Templates only
-            return self.prompt_manager.combine_prompts(selected_templates)
-        else:
-            return ""
+        return self.prompt_manager.build_prompt(custom_text, self.get_selected_templates())
@@ -0,0 +1,75 @@
+"""Conversions between PIL images, encoded bytes and Qt images."""
+
+from PySide6.QtGui import QImage, QPixmap
+from PIL import Image
+
+from ..core.encoded_image import EncodedImage
+
+# PIL mode -> (QImage format, bytes per pixel) for layouts Qt reads directly
+QT_FORMATS = {
+    "RGB": (QImage.Format_RGB888, 3),
+    "RGBA": (QImage.Format_RGBA8888, 4),
+    "RGBX": (QImage.Format_RGBX8888, 4),
+    "L": (QImage.Format_Grayscale8, 1),
+    "I;16": (QImage.Format_Grayscale16, 2),
+}
+
+
+def pil_to_qimage(image: Image.Image) -> QImage:
+    """
+    Wrap a PIL image in a QImage without an intermediate RGBA conversion.
+
+    Modes Qt understands (RGB, RGBA, L, ...) are handed over as packed rows
+    with the matching format and an explicit bytes-per-line, so an RGB image
+    costs 3 bytes per pixel instead of 4. Bilevel images become L; other
+    modes are converted to RGB, or RGBA when they carry transparency. The
+    QImage references the packed buffer, which is kept alive by the returned
+    object; call ``copy()`` before handing it to code that outlives it.
+
+    Args:
+        image: PIL image
+
+    Returns:
+        QImage sharing the packed pixel buffer
+    """
+    if image.mode == "1":
+        image = image.convert("L")
+    elif image.mode not in QT_FORMATS:
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    qt_format, bytes_per_pixel = QT_FORMATS[image.mode]
+    data = image.tobytes()
+    qimage = QImage(data, image.width, image.height, image.width * bytes_per_pixel, qt_format)
+    # QImage doesn't own the memory it was given; tie the buffer to its lifetime
+    qimage._buffer = data
+    return qimage
+
+
+def pil_to_qpixmap(image: Image.Image) -> QPixmap:
+    """Convert a PIL image to a QPixmap (a single copy into the pixmap)."""
+    return QPixmap.fromImage(pil_to_qimage(image))
+
+
+def encoded_to_qimage(image: EncodedImage) -> QImage:
+    """
+    Decode encoded image bytes into a QImage.
+
+    Qt's decoders are used where available; other formats go through PIL.
+
+    Args:
+        image: Encoded image
+
+    Returns:
+        Decoded QImage (null if the data can't be decoded)
+    """
+    qimage = QImage.fromData(image.data)
+    if qimage.isNull():
+        # Format without a Qt image plugin; let PIL decode it
+        qimage = pil_to_qimage(image.decode()).copy()
+    return qimage
+
+
+def encoded_to_qpixmap(image: EncodedImage) -> QPixmap:
+    """Decode encoded image bytes straight into a QPixmap."""
+    return QPixmap.fromImage(encoded_to_qimage(image))
@@ -0,0 +1,233 @@
+"""Virtualized strip of version thumbnails."""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtWidgets import QListView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QThreadPool, Signal
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+from .background_tasks import TaskRunner
+from ..utils.file_manager import FileManager
+from ..utils.thumbnail_cache import ThumbnailCache
+
+
+def _load_thumbnail(cache: ThumbnailCache, path: Path, content_hash: str) -> QImage:
+    """Fetch or generate one thumbnail (runs on the thread pool)."""
+    image = QImage(str(cache.get(path, content_hash)))
+    if image.isNull():
+        raise OSError(f"Unreadable thumbnail for {path}")
+    return image
+
+
+class VersionListModel(QAbstractListModel):
+    """
+    List model with one row per version (row 0 is the original).
+
+    Thumbnails are only requested when the view asks for a row's
+    decoration, i.e. when the row becomes visible, and are produced on a
+    thread pool via ``ThumbnailCache``. Until they arrive a placeholder is
+    shown. At most ``max_pixmaps`` thumbnails are kept in memory.
+    """
+
+    VersionRole = Qt.UserRole + 1
+    DEFAULT_MAX_PIXMAPS = 512
+
+    def __init__(
+        self,
+        file_manager: FileManager,
+        thumbnail_cache: Optional[ThumbnailCache] = None,
+        thread_pool: Optional[QThreadPool] = None,
+        max_pixmaps: int = DEFAULT_MAX_PIXMAPS,
+        parent=None
+    ):
+        """
+        Initialize the model from the file manager's versions.
+
+        Args:
+            file_manager: Source of version files and their content hashes
+            thumbnail_cache: Thumbnail cache; a default one is created if None
+            thread_pool: Pool for thumbnail jobs; defaults to the global pool
+            max_pixmaps: Maximum number of thumbnails held in memory
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache()
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.max_pixmaps = max_pixmaps
+
+        size = self.thumbnail_cache.size
+        self.placeholder = QPixmap(size, size)
+        self.placeholder.fill(QColor(0, 0, 0, 0))
+
+        self._versions: List[int] = [0] + [
+            record["version"] for record in file_manager.get_history()
+        ]
+        self._pixmaps: "OrderedDict[int, QPixmap]" = OrderedDict()  # LRU, oldest first
+        self._requested: Dict[int, str] = {}  # version -> content hash being loaded
+        self._tasks: Dict[int, Tuple[int, str]] = {}  # task id -> (version, content hash)
+
+        self._runner = TaskRunner(self.thread_pool, self)
+        self._runner.finished.connect(self._on_loaded)
+        self._runner.failed.connect(self._on_failed)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._versions)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        version = self._versions[index.row()]
+        if role == Qt.DisplayRole:
+            return "Original" if version == 0 else f"v{version}"
+        if role == self.VersionRole:
+            return version
+        if role == Qt.ToolTipRole:
+            info = self.file_manager.get_version_info(version)
+            return info.get("prompt") if info else None
+        if role == Qt.DecorationRole:
+            pixmap = self._pixmaps.get(version)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(version)
+                return pixmap
+            self._request(version)
+            return self.placeholder
+        return None
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by loaded thumbnails."""
+        return sum(
+            pixmap.width() * pixmap.height() * max(pixmap.depth() // 8, 1)
+            for pixmap in self._pixmaps.values()
+        )
+
+    def release(self):
+        """Drop all loaded thumbnails; visible ones are reloaded from the cache on demand."""
+        self._pixmaps.clear()
+        self._requested.clear()
+
+    def row_of(self, version: int) -> int:
+        """Get the row showing a version, or -1."""
+        try:
+            return self._versions.index(version)
+        except ValueError:
+            return -1
+
+    def _identity(self, version: int) -> Optional[Tuple[Path, str]]:
+        """Get the file and content hash of a saved version."""
+        info = self.file_manager.get_version_info(version)
+        if not info or "sha256" not in info:
+            return None
+        return self.file_manager.get_current_version_path(version), info["sha256"]
+
+    def _request(self, version: int):
+        """Start loading the thumbnail of a visible version."""
+        if version in self._requested:
+            return
+        identity = self._identity(version)
+        if identity is None:
+            return  # Not saved yet; add_version supplies its thumbnail
+
+        path, content_hash = identity
+        self._requested[version] = content_hash
+        task_id = self._runner.submit(_load_thumbnail, self.thumbnail_cache, path, content_hash)
+        self._tasks[task_id] = (version, content_hash)
+
+    def _on_loaded(self, task_id: int, image: QImage):
+        version, content_hash = self._tasks.pop(task_id)
+        if self._requested.get(version) != content_hash:
+            return  # The version was discarded or replaced meanwhile
+        del self._requested[version]
+        self._store(version, QPixmap.fromImage(image))
+
+    def _on_failed(self, task_id: int, message: str):
+        # Leave the _requested entry in place so a broken file isn't retried on every repaint
+        self._tasks.pop(task_id, None)
+
+    def _store(self, version: int, pixmap: QPixmap):
+        self._pixmaps[version] = pixmap
+        self._pixmaps.move_to_end(version)
+        while len(self._pixmaps) > self.max_pixmaps:
+            evicted, _ = self._pixmaps.popitem(last=False)
+            self._requested.pop(evicted, None)
+
+        row = self.row_of(version)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def add_version(self, version: int, pixmap: Optional[QPixmap] = None):
+        """
+        Append a new version.
+
+        Args:
+            version: Version number
+            pixmap: Image to derive the thumbnail from, for versions still being saved
+        """
+        row = len(self._versions)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._versions.append(version)
+        self.endInsertRows()
+
+        if pixmap is not None and not pixmap.isNull():
+            size = self.thumbnail_cache.size
+            thumbnail = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self._store(version, thumbnail)
+
+    def refresh(self, version: int):
+        """Ask the view to fetch a version's thumbnail again, e.g. once it was saved."""
+        row = self.row_of(version)
+        if row >= 0 and version not in self._pixmaps:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def remove_version(self, version: int):
+        """Remove a discarded version."""
+        row = self.row_of(version)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._versions[row]
+        self.endRemoveRows()
+        self._pixmaps.pop(version, None)
+        self._requested.pop(version, None)
+
+
+class VersionStrip(QListView):
+    """Horizontal, virtualized list of version thumbnails."""
+
+    version_selected = Signal(int)
+
+    def __init__(self, model: VersionListModel, parent=None):
+        super().__init__(parent)
+        size = model.thumbnail_cache.size
+        self.setModel(model)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        # Uniform sizes let the view lay out thousands of rows without querying them
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setIconSize(QSize(size, size))
+        self.setGridSize(QSize(size + 16, size + 28))
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setMinimumHeight(size + 48)
+
+        self.clicked.connect(self._on_clicked)
+
+    def _on_clicked(self, index: QModelIndex):
+        self.version_selected.emit(index.data(VersionListModel.VersionRole))
+
+    def select_version(self, version: int):
+        """Highlight a version and scroll it into view."""
+        row = self.model().row_of(version)
+        if row >= 0:
+            index = self.model().index(row)
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
@@ -0,0 +1,74 @@
+"""Background thread for disk writes that shouldn't block the caller."""
+
+from concurrent.futures import Future
+from typing import Callable, Optional, TypeVar
+import queue
+import threading
+
+T = TypeVar("T")
+
+
+class BackgroundWriter:
+    """
+    Runs write jobs one at a time on a dedicated thread.
+
+    Jobs are taken from a bounded queue: once ``max_pending`` jobs are
+    waiting, ``submit`` blocks until the writer catches up, which keeps
+    memory held by queued images bounded. Each job returns a
+    ``concurrent.futures.Future`` for completion notification.
+    """
+
+    DEFAULT_MAX_PENDING = 8
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, name: str = "background-writer"):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            max_pending: Maximum number of queued jobs before ``submit`` blocks
+            name: Thread name
+        """
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        """
+        Queue a job.
+
+        Args:
+            fn: Function to call on the writer thread
+            *args: Positional arguments for ``fn``
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            Future resolving to the function's return value
+        """
+        future: "Future[T]" = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the writer after the queued jobs have run.
+
+        Args:
+            wait: Block until the thread has finished
+        """
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
@@ -1,28 +1,248 @@
 """File management and versioning system."""
 
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from io import BytesIO
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import logging
+import os
+import errno
+import re
 import shutil
+import sys
+import threading
 from PIL import Image
 
+from ..core.encoded_image import EncodedImage
+
+logger = logging.getLogger(__name__)
+
+# ioctl request number of Linux FICLONE (copy-on-write clone on btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def _reflink(source: Path, destination: Path):
+    """Clone a file with a copy-on-write reflink, raising OSError if unsupported."""
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux")
+
+    import fcntl
+
+    # "xb" never truncates an existing file, which may be a hardlink to the source
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            destination.unlink()
+            raise
+    shutil.copystat(source, destination)
+
+
+def _publish(temp_path: Path, destination: Path):
+    """
+    Move a finished temp file to ``destination``, which must not exist yet.
+
+    Raises:
+        FileExistsError: If ``destination`` already exists; ``temp_path`` is removed
+    """
+    try:
+        os.link(temp_path, destination)
+    except FileExistsError:
+        raise
+    except OSError:
+        # No hardlinks on this filesystem; a rename is atomic but would overwrite
+        if destination.exists():
+            raise FileExistsError(errno.EEXIST, "File exists", str(destination))
+        os.replace(temp_path, destination)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def snapshot_file(source: Path, destination: Path) -> str:
+    """
+    Create ``destination`` with the contents of ``source`` as cheaply as possible.
+
+    Tries a reflink (independent copy sharing blocks until either side
+    changes), then a hardlink, and finally a full copy. A hardlink is the
+    same file as ``source``: the app never writes to it, but programs that
+    save ``source`` in place change ``destination`` as well. ``FileManager``
+    detects that and replaces its snapshot with a copy. Reflinks and copies
+    are made under a temporary name first, so ``destination`` only ever
+    appears complete, and an existing ``destination`` is never touched.
+
+    Args:
+        source: Existing file
+        destination: New path, on the same filesystem for reflinks and hardlinks
+
+    Returns:
+        Method used: "reflink", "hardlink" or "copy"
+
+    Raises:
+        FileExistsError: If ``destination`` already exists, e.g. because
+            another FileManager snapshotted the same file concurrently
+    """
+    destination = Path(destination)
+    temp_path = destination.with_name(
+        f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+
+    try:
+        _reflink(source, temp_path)
+    except OSError:
+        pass
+    else:
+        _publish(temp_path, destination)
+        return "reflink"
+
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except FileExistsError:
+        raise
+    except OSError:
+        pass
+
+    try:
+        shutil.copy2(source, temp_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    _publish(temp_path, destination)
+    return "copy"
+
+
+class StorageOptions:
+    """Settings for how versions are encoded on disk."""
+
+    SUPPORTED_FORMATS = ("ORIGINAL", "PNG", "WEBP", "JPEG")
+    EXTENSIONS = {"PNG": ".png", "WEBP": ".webp", "JPEG": ".jpg"}
+
+    def __init__(
+        self,
+        format: str = "ORIGINAL",
+        quality: int = 90,
+        lossless: bool = False,
+        compress_level: int = 6
+    ):
+        """
+        Initialize storage options.
+
+        Args:
+            format: "ORIGINAL" keeps the model's bytes unchanged (PNG for decoded
+                    images); "PNG", "WEBP" or "JPEG" re-encode every version
+            quality: Quality for lossy WebP and JPEG (1-100)
+            lossless: Use lossless WebP (ignored for other formats)
+            compress_level: zlib level for PNG (0-9); higher is smaller but slower
+        """
+        format = format.upper()
+        if format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported storage format: {format}")
+        if not 1 <= quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+        if not 0 <= compress_level <= 9:
+            raise ValueError("compress_level must be between 0 and 9")
+
+        self.format = format
+        self.quality = quality
+        self.lossless = lossless
+        self.compress_level = compress_level
+
+    def extension_for(self, image: Union[Image.Image, EncodedImage]) -> str:
+        """Get the extension, including the dot, that ``encode`` will use for an image."""
+        if isinstance(image, EncodedImage) and self.format == "ORIGINAL":
+            return image.extension
+        return self.EXTENSIONS["PNG" if self.format == "ORIGINAL" else self.format]
+
+    def encode(self, image: Union[Image.Image, EncodedImage]) -> Tuple[bytes, str]:
+        """
+        Encode an image for storage.
+
+        Args:
+            image: Decoded or encoded image
+
+        Returns:
+            Tuple of (file bytes, extension including the dot)
+        """
+        if isinstance(image, EncodedImage):
+            if self.format == "ORIGINAL":
+                return image.data, image.extension
+            image = image.decode()
+
+        format = "PNG" if self.format == "ORIGINAL" else self.format
+        if format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif format != "JPEG" and image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+
+        buffer = BytesIO()
+        if format == "PNG":
+            image.save(buffer, "PNG", compress_level=self.compress_level)
+        elif format == "WEBP":
+            image.save(buffer, "WEBP", lossless=self.lossless, quality=self.quality, method=4)
+        else:
+            image.save(buffer, "JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue(), self.EXTENSIONS[format]
+
+    def __repr__(self) -> str:
+        return (
+            f"StorageOptions(format='{self.format}', quality={self.quality}, "
+            f"lossless={self.lossless}, compress_level={self.compress_level})"
+        )
+
 
 class FileManager:
-    """Manages file versioning for edited images."""
+    """
+    Manages file versioning for edited images.
+
+    Each version directory holds a ``manifest.json`` recording, for the
+    original and every version: file name, prompt, model, creation time,
+    dimensions and SHA-256 of the file. The manifest is loaded once, so
+    counting, looking up and listing versions never touch the directory.
+    If the manifest is missing or unreadable it is rebuilt from the files.
+    Versions may be stored in different formats; readers go through the
+    manifest, so mixed PNG/WebP/JPEG histories work transparently.
+
+    Methods are thread-safe, so versions can be saved from a background
+    writer while the GUI thread queries them. Several FileManagers may
+    share a version directory (two tabs, or the GUI next to a batch run):
+    ``add_version`` and ``reserve_version`` allocate numbers under the
+    manifest lock, so none of them overwrites another's versions.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    MANIFEST_LOCK_NAME = ".manifest.lock"
+    MANIFEST_FORMAT = 1
+    VERSION_FILE_PATTERN = re.compile(r"^v(\d+)\.(?:png|jpg|webp|gif)$")
 
-    def __init__(self, original_image_path: Path):
+    def __init__(self, original_image_path: Path, storage_options: Optional[StorageOptions] = None):
         """
         Initialize the file manager.
 
         Args:
             original_image_path: Path to the original image file
+            storage_options: How new versions are encoded; defaults keep the model's bytes
         """
         self.original_path = Path(original_image_path)
+        self.storage_options = storage_options or StorageOptions()
         self.version_dir = self._setup_version_directory()
-        self.original_in_version_dir = self.version_dir / "original.png"
+        self.original_in_version_dir = self._find_original()
+        self.manifest_path = self.version_dir / self.MANIFEST_NAME
 
         # Move original to version directory if not already done
         if not self.original_in_version_dir.exists():
             self._move_original()
 
+        self._original: Dict = {}
+        self._versions: Dict[int, Dict] = {}
+        self._version_numbers: List[int] = []  # kept sorted for ordered queries
+        self._lock = threading.RLock()
+        self._load_manifest()
+
     def _setup_version_directory(self) -> Path:
         """
         Set up the version directory for this image.
@@ -30,7 +250,7 @@ class FileManager:
         Following the spec:
         - If original is foo/a.png
         - Create foo/a/ directory
-        - Move original to foo/a/original.png
+        - Move original to foo/a/original.png (keeping the original extension)
 
         Returns:
             Path to the version directory
@@ -45,24 +265,299 @@ class FileManager:
 
         return version_dir
 
+    def _find_original(self) -> Path:
+        """Locate the snapshot of the original, whatever its extension."""
+        for path in sorted(self.version_dir.glob("original.*")):
+            return path
+        return self.version_dir / f"original{self.original_path.suffix.lower()}"
+
     def _move_original(self):
-        """Move the original file into the version directory."""
-        # Copy to preserve the original
-        shutil.copy2(self.original_path, self.original_in_version_dir)
+        """Snapshot the original file into the version directory."""
+        # Keep the user's file in place; reflink or hardlink avoid duplicating its bytes
+        try:
+            snapshot_file(self.original_path, self.original_in_version_dir)
+        except FileExistsError:
+            pass  # Another FileManager snapshotted it first
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    @staticmethod
+    def _describe_file(path: Path, data: Optional[bytes] = None) -> Dict:
+        """Build the manifest fields describing an image file."""
+        if data is None:
+            data = path.read_bytes()
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+        return {
+            "file": path.name,
+            "width": width,
+            "height": height,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+
+    def _describe_original(self) -> Dict:
+        """Build the manifest record of the original snapshot."""
+        record = self._describe_file(self.original_in_version_dir)
+        record["mtime_ns"] = self.original_in_version_dir.stat().st_mtime_ns
+        record["created"] = self._now()
+        return record
+
+    def _load_manifest(self):
+        """Load the manifest, rebuilding it from the directory if needed."""
+        with self._lock, self._manifest_file_lock():
+            if not self._read_manifest():
+                self._rebuild_manifest()
+            elif self._check_original():
+                self._write_manifest()
+
+    def _check_original(self) -> bool:
+        """
+        Detect changes made to the original snapshot by other programs.
+
+        A hardlinked snapshot changes whenever the user's file is saved in
+        place. If its size, mtime or SHA-256 no longer match the manifest,
+        logs a warning and snapshots it again with a real copy, so later
+        changes to the user's file stay out of the history.
+
+        Returns:
+            True if the original's record was updated
+        """
+        path = self.original_in_version_dir
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        record = self._original
+        if stat.st_size == record.get("size") and stat.st_mtime_ns == record.get("mtime_ns"):
+            return False
+
+        data = path.read_bytes()
+        unchanged = hashlib.sha256(data).hexdigest() == record.get("sha256")
+        if len(data) == record.get("size") and unchanged:
+            record["mtime_ns"] = stat.st_mtime_ns  # Touched or from an older manifest
+            return True
+
+        logger.warning(
+            "The original of %s was changed outside the app; snapshotting its current "
+            "contents with a copy",
+            self.original_path
+        )
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copy2(path, temp_path)
+            os.replace(temp_path, path)  # Breaks the link to the user's file
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        self._original = self._describe_original()
+        return True
 
-    def save_version(self, image: Image.Image, version_number: int) -> Path:
+    def _read_manifest(self) -> bool:
+        """Replace the in-memory records with the manifest on disk; False if it is unusable."""
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("format") != self.MANIFEST_FORMAT:
+                raise ValueError("Unknown manifest format")
+            original = manifest["original"]
+            versions = {int(number): record for number, record in manifest["versions"].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            return False
+
+        self._original = original
+        self._versions = versions
+        self._version_numbers = sorted(versions)
+        return True
+
+    @contextmanager
+    def _manifest_file_lock(self):
+        """
+        Hold an exclusive lock on the version directory's manifest.
+
+        Serializes manifest updates between FileManagers of the same image,
+        in this process or another (e.g. the GUI and a batch run). Where
+        ``fcntl`` isn't available only this instance's thread lock applies.
         """
-        Save a new version of the image.
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+
+        with open(self.version_dir / self.MANIFEST_LOCK_NAME, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _manifest_update(self):
+        """
+        Read-modify-write the manifest.
+
+        Reloads the records from disk first, so changes made meanwhile by
+        other FileManagers of the same image are kept, then writes the
+        manifest once the caller has applied its change.
+        """
+        with self._lock, self._manifest_file_lock():
+            self._read_manifest()
+            yield
+            self._write_manifest()
+
+    def rebuild_manifest(self):
+        """Recreate the manifest by scanning the version directory."""
+        with self._lock, self._manifest_file_lock():
+            self._rebuild_manifest()
+
+    def _rebuild_manifest(self):
+        self._original = self._describe_original()
+        self._versions = {}
+
+        for path in self.version_dir.iterdir():
+            match = self.VERSION_FILE_PATTERN.match(path.name)
+            if not match:
+                continue
+            try:
+                record = self._describe_file(path)
+            except (OSError, ValueError):
+                continue  # Reserved by reserve_version but not written (yet)
+            modified = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+            record.update({
+                "version": int(match.group(1)),
+                "prompt": None,
+                "model": None,
+                "created": modified.isoformat(timespec="seconds"),
+            })
+            self._versions[record["version"]] = record
+
+        self._version_numbers = sorted(self._versions)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        """Persist the manifest atomically."""
+        manifest = {
+            "format": self.MANIFEST_FORMAT,
+            "original": self._original,
+            "versions": {str(number): self._versions[number] for number in self._version_numbers},
+        }
+        tmp_path = self.manifest_path.with_name(
+            f".{self.MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    def _version_files(self, version_number: int) -> List[Path]:
+        """Get the files on disk for a version number, whatever their extension."""
+        return [
+            path for path in self.version_dir.glob(f"v{version_number}.*")
+            if self.VERSION_FILE_PATTERN.match(path.name)
+        ]
+
+    def reserve_version(self, image: Union[Image.Image, EncodedImage]) -> Tuple[int, Path]:
+        """
+        Allocate the next version number for an image.
+
+        Under the manifest lock, takes one more than the highest version in
+        the manifest or on disk and creates its file empty and exclusively,
+        so no other FileManager of this image can take the same number. Fill
+        it in with ``save_version``.
+
+        Args:
+            image: Image that will be saved, to pick the file extension
+
+        Returns:
+            Tuple of (version number, path of the reserved file)
+        """
+        extension = self.storage_options.extension_for(image)
+        with self._lock, self._manifest_file_lock():
+            self._read_manifest()
+            on_disk = [
+                int(match.group(1))
+                for match in map(self.VERSION_FILE_PATTERN.match, os.listdir(self.version_dir))
+                if match
+            ]
+            version_number = max([self.get_latest_version_number(), *on_disk]) + 1
+            while True:
+                version_path = self.version_dir / f"v{version_number}{extension}"
+                try:
+                    os.close(os.open(version_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+                except FileExistsError:
+                    version_number += 1
+                    continue
+                return version_number, version_path
+
+    def add_version(
+        self,
+        image: Union[Image.Image, EncodedImage],
+        prompt: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Tuple[int, Path]:
+        """
+        Save an image as the next version.
 
         Args:
-            image: PIL Image to save
+            image: Image to save
+            prompt: Prompt that produced this version, for the history
+            model: Model that produced this version
+
+        Returns:
+            Tuple of (version number, path to the saved version file)
+        """
+        version_number, version_path = self.reserve_version(image)
+        try:
+            return version_number, self.save_version(image, version_number, prompt, model)
+        except BaseException:
+            version_path.unlink(missing_ok=True)
+            raise
+
+    def save_version(
+        self,
+        image: Union[Image.Image, EncodedImage],
+        version_number: int,
+        prompt: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Path:
+        """
+        Save an image as a given version, replacing that version if it exists.
+
+        The file is encoded according to ``storage_options``. By default
+        encoded images are written byte for byte with the extension of their
+        format and PIL images are encoded as PNG. To add a version use
+        ``add_version``, or ``reserve_version`` and then this method; picking
+        the number yourself races with other FileManagers of the image.
+
+        Args:
+            image: Image to save
             version_number: Version number (1, 2, 3, etc.)
+            prompt: Prompt that produced this version, for the history
+            model: Model that produced this version
 
         Returns:
             Path to the saved version file
         """
-        version_path = self.version_dir / f"v{version_number}.png"
-        image.save(version_path, "PNG")
+        data, extension = self.storage_options.encode(image)
+        version_path = self.version_dir / f"v{version_number}{extension}"
+        version_path.write_bytes(data)
+        for previous_path in self._version_files(version_number):
+            if previous_path != version_path:
+                previous_path.unlink(missing_ok=True)
+
+        record = self._describe_file(version_path, data)
+        record.update({
+            "version": version_number,
+            "prompt": prompt,
+            "model": model,
+            "created": self._now(),
+        })
+
+        with self._manifest_update():
+            if version_number not in self._versions:
+                insort(self._version_numbers, version_number)
+            self._versions[version_number] = record
+
         return version_path
 
     def get_current_version_path(self, version_number: int) -> Path:
@@ -77,8 +572,34 @@ class FileManager:
         """
         if version_number == 0:
             return self.original_in_version_dir
-        else:
-            return self.version_dir / f"v{version_number}.png"
+
+        with self._lock:
+            record = self._versions.get(version_number)
+        if record is not None:
+            return self.version_dir / record["file"]
+        return self.version_dir / f"v{version_number}.png"
+
+    def get_version_info(self, version_number: int) -> Optional[Dict]:
+        """
+        Get the manifest record for a version.
+
+        Args:
+            version_number: 0 for original, 1+ for versions
+
+        Returns:
+            Dict with file, prompt, model, created, width, height, size and sha256,
+            or None if the version doesn't exist
+        """
+        with self._lock:
+            if version_number == 0:
+                return dict(self._original)
+            record = self._versions.get(version_number)
+            return dict(record) if record is not None else None
+
+    def has_version(self, version_number: int) -> bool:
+        """Check whether a version exists (0 is always the original)."""
+        with self._lock:
+            return version_number == 0 or version_number in self._versions
 
     def delete_version(self, version_number: int):
         """
@@ -90,9 +611,11 @@ class FileManager:
         if version_number <= 0:
             raise ValueError("Cannot delete original version")
 
-        version_path = self.get_current_version_path(version_number)
-        if version_path.exists():
-            version_path.unlink()
+        with self._manifest_update():
+            for version_path in self._version_files(version_number):
+                version_path.unlink(missing_ok=True)
+            if self._versions.pop(version_number, None) is not None:
+                del self._version_numbers[bisect_left(self._version_numbers, version_number)]
 
     def get_all_versions(self) -> list[Path]:
         """
@@ -102,12 +625,22 @@ class FileManager:
             List of paths: [original, v1, v2, ...]
         """
         versions = [self.original_in_version_dir]
+        with self._lock:
+            versions.extend(
+                self.version_dir / self._versions[number]["file"]
+                for number in self._version_numbers
+            )
+        return versions
 
-        # Find all version files
-        version_files = sorted(self.version_dir.glob("v*.png"))
-        versions.extend(version_files)
+    def get_history(self) -> List[Dict]:
+        """
+        Get the manifest records of all versions in order.
 
-        return versions
+        Returns:
+            List of dicts for v1, v2, ... (the original is not included)
+        """
+        with self._lock:
+            return [dict(self._versions[number]) for number in self._version_numbers]
 
     def get_version_count(self) -> int:
         """
@@ -116,4 +649,15 @@ class FileManager:
         Returns:
             Number of edited versions
         """
-        return len(list(self.version_dir.glob("v*.png")))
+        with self._lock:
+            return len(self._version_numbers)
+
+    def get_latest_version_number(self) -> int:
+        """
+        Get the highest version number.
+
+        Returns:
+            Latest version number, or 0 if there is only the original
+        """
+        with self._lock:
+            return self._version_numbers[-1] if self._version_numbers else 0
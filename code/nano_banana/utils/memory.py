@@ -0,0 +1,28 @@
+"""System memory queries."""
+
+from typing import Optional
+import os
+
+
+def available_memory() -> Optional[int]:
+    """
+    Get the memory available to new allocations without swapping.
+
+    Uses ``MemAvailable`` from ``/proc/meminfo`` on Linux and the free
+    physical page count elsewhere on POSIX.
+
+    Returns:
+        Available bytes, or None if the platform doesn't report it
+    """
+    try:
+        with open("/proc/meminfo", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
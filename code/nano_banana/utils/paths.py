@@ -0,0 +1,24 @@
+"""Well-known locations used by Nano Banana Desktop."""
+
+from pathlib import Path
+import os
+
+APP_DIR_NAME = "nano-banana-desktop"
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Get (and create) a directory under the per-user cache location.
+
+    Honours ``XDG_CACHE_HOME`` and falls back to ``~/.cache``.
+
+    Args:
+        *parts: Optional sub-directory names, e.g. ``get_cache_dir("responses")``
+
+    Returns:
+        Path to the cache directory
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    cache_dir = Path(base, APP_DIR_NAME, *parts)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
@@ -1,8 +1,13 @@
 """Utilities for loading and managing prompt templates."""
 
 from pathlib import Path
-from typing import Dict, List, Optional
-import re
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+from .paths import get_cache_dir
 
 
 class PromptTemplate:
@@ -25,33 +30,111 @@ class PromptTemplate:
 
 
 class PromptManager:
-    """Manages loading and organizing prompt templates."""
+    """
+    Manages loading and organizing prompt templates.
+
+    Templates are read once and stored in a compiled index under the user
+    cache. Later loads stat the prompt files and, if none changed, read the
+    index in one go instead of every ``.md`` file. ``shared()`` returns one
+    manager per process, so opening another tab does no prompt I/O at all.
+    """
+
+    INDEX_VERSION = 1
+
+    _shared: Optional["PromptManager"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, prompts_dir: Optional[Path] = None, index_path: Optional[Path] = None):
+        """
+        Initialize the manager and load the templates.
 
-    def __init__(self, prompts_dir: Optional[Path] = None):
+        Args:
+            prompts_dir: Directory of category sub-directories. Defaults to the bundled prompts.
+            index_path: Compiled index file. Defaults to one per prompts directory
+                under the user cache.
+
+        Raises:
+            FileNotFoundError: If the prompts directory doesn't exist
+        """
         if prompts_dir is None:
             # Default to prompts directory relative to this file
             prompts_dir = Path(__file__).parent.parent.parent / "prompts"
 
         self.prompts_dir = Path(prompts_dir)
+        self.index_path = Path(index_path) if index_path else None
         self.templates: Dict[str, List[PromptTemplate]] = {}
+        self._by_name: Dict[str, PromptTemplate] = {}
         self._load_templates()
 
+    @classmethod
+    def shared(cls) -> "PromptManager":
+        """Get the process-wide manager for the bundled prompts, loading it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _default_index_path(self) -> Optional[Path]:
+        key = hashlib.sha256(str(self.prompts_dir.resolve()).encode("utf-8")).hexdigest()[:16]
+        try:
+            return get_cache_dir("prompts") / f"index-{key}.json"
+        except OSError:
+            return None  # No writable cache; read the files every time
+
+    def _scan(self) -> List[list]:
+        """
+        List the template files with their modification times and sizes.
+
+        Returns:
+            ``[category, [[file name, mtime_ns, size], ...]]`` per category, sorted
+        """
+        signature = []
+        with os.scandir(self.prompts_dir) as categories:
+            category_dirs = sorted(
+                (entry for entry in categories if entry.is_dir()), key=lambda entry: entry.name
+            )
+        for category_dir in category_dirs:
+            with os.scandir(category_dir.path) as entries:
+                files = sorted(
+                    [entry.name, entry.stat().st_mtime_ns, entry.stat().st_size]
+                    for entry in entries
+                    if entry.name.endswith(".md") and entry.is_file()
+                )
+            signature.append([category_dir.name, files])
+        return signature
+
     def _load_templates(self):
-        """Load all prompt templates from the prompts directory."""
+        """Load all prompt templates, from the compiled index if it is current."""
         if not self.prompts_dir.exists():
             raise FileNotFoundError(f"Prompts directory not found: {self.prompts_dir}")
 
-        # Iterate through category directories
-        for category_dir in self.prompts_dir.iterdir():
-            if not category_dir.is_dir():
-                continue
+        signature = self._scan()
+        index_path = self.index_path or self._default_index_path()
+        records = self._read_index(index_path, signature) if index_path else None
+        if records is None:
+            records = self._read_templates(signature)
+            if index_path:
+                self._write_index(index_path, signature, records)
 
-            category_name = category_dir.name
+        for category_name, _ in signature:
             self.templates[category_name] = []
-
-            # Load all .md files in the category
-            for prompt_file in category_dir.glob("*.md"):
-                content = prompt_file.read_text(encoding='utf-8')
+        for category_name, file_name, content in records:
+            template = PromptTemplate(
+                name=Path(file_name).stem,
+                category=category_name,
+                content=content,
+                file_path=self.prompts_dir / category_name / file_name
+            )
+            self.templates[category_name].append(template)
+            # The first template with a name wins, as with the former linear search
+            self._by_name.setdefault(template.name, template)
+
+    def _read_templates(self, signature: List[list]) -> List[Tuple[str, str, str]]:
+        """Read every template file; return ``(category, file name, content)`` records."""
+        records = []
+        for category_name, files in signature:
+            for file_name, _, _ in files:
+                content = (self.prompts_dir / category_name / file_name).read_text(encoding='utf-8')
 
                 # Skip the markdown header if present
                 lines = content.split('\n')
@@ -59,14 +142,50 @@ class PromptManager:
                     # Remove the title line
                     content = '\n'.join(lines[1:]).strip()
 
-                template = PromptTemplate(
-                    name=prompt_file.stem,
-                    category=category_name,
-                    content=content,
-                    file_path=prompt_file
-                )
-
-                self.templates[category_name].append(template)
+                records.append((category_name, file_name, content))
+        return records
+
+    def _read_index(
+        self,
+        index_path: Path,
+        signature: List[list]
+    ) -> Optional[List[Tuple[str, str, str]]]:
+        """Get the records from the compiled index, or None if it is missing or stale."""
+        try:
+            index = json.loads(index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict):
+            return None
+        if index.get("version") != self.INDEX_VERSION or index.get("signature") != signature:
+            return None
+        try:
+            return [
+                (category, file_name, content)
+                for category, file_name, content in index["templates"]
+            ]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _write_index(
+        self,
+        index_path: Path,
+        signature: List[list],
+        records: List[Tuple[str, str, str]]
+    ):
+        """Store the compiled index atomically; failures only cost the next load a full read."""
+        index = {
+            "version": self.INDEX_VERSION,
+            "prompts_dir": str(self.prompts_dir.resolve()),
+            "signature": signature,
+            "templates": records,
+        }
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(json.dumps(index), encoding='utf-8')
+            os.replace(temp_path, index_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
 
     def get_categories(self) -> List[str]:
         """Get list of all prompt categories."""
@@ -85,11 +204,7 @@ class PromptManager:
 
     def get_template_by_name(self, name: str) -> Optional[PromptTemplate]:
         """Find a template by its name (searches all categories)."""
-        for templates in self.templates.values():
-            for template in templates:
-                if template.name == name:
-                    return template
-        return None
+        return self._by_name.get(name)
 
     def combine_prompts(self, templates: List[PromptTemplate]) -> str:
         """
@@ -129,6 +244,33 @@ class PromptManager:
 
         return combined.strip()
 
+    def build_prompt(
+        self,
+        custom_text: str = "",
+        templates: Optional[List[PromptTemplate]] = None
+    ) -> str:
+        """
+        Build the final prompt from custom text and/or templates.
+
+        Args:
+            custom_text: Optional custom instructions
+            templates: Optional templates to apply
+
+        Returns:
+            Prompt string, empty if neither was given
+        """
+        if custom_text and templates:
+            # Custom + templates
+            return self.create_custom_prompt(custom_text, templates)
+        elif custom_text:
+            # Custom only
+            return custom_text
+        elif templates:
+            # Templates only
+            return self.combine_prompts(templates)
+        else:
+            return ""
+
 
 if __name__ == "__main__":
     # Demo/test code
@@ -0,0 +1,173 @@
+"""Persistent on-disk cache of version thumbnails."""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import threading
+from PIL import Image, ImageOps
+
+from .paths import get_cache_dir
+
+
+class ThumbnailCache:
+    """
+    Thumbnails of version files, stored as small PNGs under the user cache.
+
+    Entries are keyed by the file's content hash (as recorded in the version
+    manifest) together with its modification time and size, so a file that
+    is replaced in place gets a fresh thumbnail. Copies of a version made
+    at different times therefore get a thumbnail each. Thumbnails are
+    written atomically, so several background workers may generate them
+    concurrently.
+
+    Like ``ResponseCache``, the cache is an LRU bounded by ``max_bytes``,
+    with recency tracked by file modification times so it survives
+    restarts. Thumbnails of replaced or discarded versions are never
+    requested again and age out.
+    """
+
+    DEFAULT_SIZE = 160
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        size: int = DEFAULT_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Cache directory. Defaults to the per-user cache location.
+            size: Longest edge of generated thumbnails in pixels
+            max_bytes: Maximum total size of all thumbnails before eviction
+        """
+        self.directory = Path(directory) if directory else get_cache_dir("thumbnails")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self._load_index()
+
+    def make_key(self, path: Path, content_hash: str) -> str:
+        """
+        Build the cache key for a file.
+
+        Args:
+            path: Image file
+            content_hash: SHA-256 of the file contents
+
+        Returns:
+            Hex digest identifying the thumbnail
+        """
+        stat = Path(path).stat()
+        identity = f"{content_hash}:{stat.st_mtime_ns}:{stat.st_size}:{self.size}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _thumbnail_path(self, key: str) -> Path:
+        # Fan out into sub-directories so no single directory grows huge
+        return self.directory / key[:2] / f"{key}.png"
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU order from the files on disk."""
+        found = []
+        for thumbnail_path in self.directory.glob("*/*.png"):
+            try:
+                stat = thumbnail_path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, thumbnail_path.stem, stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _touch(self, key: str, thumbnail_path: Path):
+        """Mark an entry as most recently used, indexing it if another process wrote it."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._add(key, thumbnail_path)
+        try:
+            os.utime(thumbnail_path)
+        except OSError:
+            pass
+
+    def _add(self, key: str, thumbnail_path: Path):
+        """Index a new entry and evict old ones if over budget. Caller must hold the lock."""
+        try:
+            size = thumbnail_path.stat().st_size
+        except OSError:
+            return
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        """Drop an entry from disk and the index. Caller must hold the lock."""
+        self._total_bytes -= self._entries.pop(key, 0)
+        self._thumbnail_path(key).unlink(missing_ok=True)
+
+    def get(self, path: Path, content_hash: str) -> Path:
+        """
+        Get the thumbnail of a file, generating it if needed.
+
+        Args:
+            path: Image file
+            content_hash: SHA-256 of the file contents
+
+        Returns:
+            Path to the thumbnail PNG
+
+        Raises:
+            OSError: If the image can't be read or the thumbnail can't be written
+        """
+        key = self.make_key(path, content_hash)
+        thumbnail_path = self._thumbnail_path(key)
+        if thumbnail_path.exists():
+            self._touch(key, thumbnail_path)
+            return thumbnail_path
+
+        with Image.open(path) as image:
+            # JPEG can decode at reduced scale, which is much cheaper for big files
+            image.draft("RGB", (self.size, self.size))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            image.thumbnail((self.size, self.size), Image.Resampling.BILINEAR)
+
+            thumbnail_path.parent.mkdir(exist_ok=True)
+            tmp_path = thumbnail_path.with_name(
+                f".{thumbnail_path.name}.{os.getpid()}.{id(image)}.tmp"
+            )
+            image.save(tmp_path, "PNG", compress_level=1)
+        os.replace(tmp_path, thumbnail_path)
+        with self._lock:
+            self._add(key, thumbnail_path)
+        return thumbnail_path
+
+    def clear(self):
+        """Remove every cached thumbnail."""
+        with self._lock:
+            for path in self.directory.glob("*/*.png"):
+                path.unlink(missing_ok=True)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Get the number and total size of cached thumbnails."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,78 @@
+"""Tests for the file versioning system."""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+
+from PIL import Image
+
+from nano_banana.utils.file_manager import FileManager
+
+
+def make_image(path, color=(255, 0, 0)):
+    Image.new("RGB", (8, 8), color).save(path)
+    return path
+
+
+def test_two_file_managers_never_overwrite_each_other(tmp_path):
+    image_path = make_image(tmp_path / "a.png")
+    first = FileManager(image_path)
+    second = FileManager(image_path)
+
+    first_number, first_path = first.add_version(Image.new("RGB", (8, 8)), prompt="A")
+    # The second manager's in-memory state still says there are no versions
+    second_number, second_path = second.add_version(Image.new("RGB", (8, 8)), prompt="B")
+
+    assert (first_number, second_number) == (1, 2)
+    assert first_path.exists() and second_path.exists()
+    history = FileManager(image_path).get_history()
+    assert [(record["version"], record["prompt"]) for record in history] == [(1, "A"), (2, "B")]
+
+
+def test_concurrent_add_version_keeps_every_version(tmp_path):
+    image_path = make_image(tmp_path / "a.png")
+    managers = [FileManager(image_path) for _ in range(4)]
+
+    def add(index):
+        return managers[index % 4].add_version(Image.new("RGB", (8, 8)), prompt=str(index))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        numbers = [number for number, _ in executor.map(add, range(40))]
+
+    assert sorted(numbers) == list(range(1, 41))
+    history = FileManager(image_path).get_history()
+    assert sorted(record["prompt"] for record in history) == sorted(str(i) for i in range(40))
+
+
+def test_reserved_version_is_skipped_by_others(tmp_path):
+    image_path = make_image(tmp_path / "a.png")
+    first = FileManager(image_path)
+    second = FileManager(image_path)
+
+    reserved, _ = first.reserve_version(Image.new("RGB", (8, 8)))
+    number, _ = second.add_version(Image.new("RGB", (8, 8)), prompt="B")
+    first.save_version(Image.new("RGB", (8, 8)), reserved, prompt="A")
+
+    assert (reserved, number) == (1, 2)
+    assert [record["prompt"] for record in FileManager(image_path).get_history()] == ["A", "B"]
+
+
+def test_original_changed_in_place_is_snapshotted_again(tmp_path, caplog):
+    image_path = make_image(tmp_path / "a.png")
+    snapshot = FileManager(image_path).original_in_version_dir
+
+    # What a hardlinked snapshot sees when another program saves the user's file in place
+    with open(snapshot, "r+b") as file:
+        file.truncate(0)
+        Image.new("RGB", (16, 4), (0, 0, 255)).save(file, "PNG")
+
+    manager = FileManager(image_path)
+
+    assert "changed outside the app" in caplog.text
+    assert not os.path.samefile(snapshot, image_path)
+    record = manager.get_version_info(0)
+    assert (record["width"], record["height"]) == (16, 4)
+    assert record["sha256"] == hashlib.sha256(snapshot.read_bytes()).hexdigest()
+    caplog.clear()
+    FileManager(image_path)
+    assert "changed outside the app" not in caplog.text
@@ -0,0 +1,47 @@
+"""Tests for the on-disk thumbnail cache."""
+
+import os
+
+from PIL import Image
+
+from nano_banana.utils.thumbnail_cache import ThumbnailCache
+
+
+def make_images(directory, count):
+    # Same pixels, so every thumbnail has the same size
+    image = Image.effect_noise((64, 64), 64)
+    paths = []
+    for index in range(count):
+        path = directory / f"v{index}.png"
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def test_cache_stays_within_max_bytes(tmp_path):
+    paths = make_images(tmp_path, 6)
+    cache = ThumbnailCache(tmp_path / "cache", size=64)
+    entry_bytes = cache.get(paths[0], "0").stat().st_size
+    cache.max_bytes = entry_bytes * 3
+
+    for index, path in enumerate(paths[1:], 1):
+        cache.get(path, str(index))
+
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert len(list((tmp_path / "cache").glob("*/*.png"))) == cache.stats()["entries"]
+
+
+def test_hits_keep_entries_alive_across_restarts(tmp_path):
+    paths = make_images(tmp_path, 4)
+    cache = ThumbnailCache(tmp_path / "cache", size=64)
+    first = cache.get(paths[0], "0")
+    second = cache.get(paths[1], "1")
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    cache.get(paths[0], "0")  # Hit: now the most recently used
+
+    reopened = ThumbnailCache(tmp_path / "cache", size=64, max_bytes=first.stat().st_size * 2)
+    reopened.get(paths[2], "2")
+
+    assert first.exists()
+    assert not second.exists()